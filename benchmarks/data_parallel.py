@@ -0,0 +1,52 @@
+import argparse
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from benchmarks.synthetic import make_text
+from pyppeteer.data_parallel import run_chunk_parallel
+from pyppeteer.symbols.protocol import call_symbol, chunk_parallel, materialize
+from pyppeteer.symbols.symbols_list import convert
+
+
+@chunk_parallel(separator='\n')
+def reverse_fields(input_stream, named_args) -> str:
+    # CPU-bound reference symbol, per-line work without shared state
+    return ''.join(';'.join(reversed(line.split(';'))) + '\n' for line in input_stream.splitlines())
+
+
+SYMBOLS = {'reverse_fields': reverse_fields, 'List.convert': convert}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Speedup of chunk-parallel execution versus worker count')
+    parser.add_argument('--input-mb', type=int, default=64, help='Size of the synthetic input text in MiB')
+    parser.add_argument('-s', '--symbol', choices=SYMBOLS.keys(), default='reverse_fields')
+    parser.add_argument('--max-workers', type=int, default=os.cpu_count(), help='Largest worker count to measure')
+    args = vars(parser.parse_args())
+
+    with tempfile.TemporaryDirectory() as workdir:
+        path = os.path.join(workdir, 'input.txt')
+        make_text(path, args['input_mb'] * 1024 * 1024)
+        with open(path, 'r') as file:
+            text = file.read()
+
+    func = SYMBOLS[args['symbol']]
+    start = time.perf_counter()
+    expected = materialize(call_symbol(func, text, {}))
+    serial = time.perf_counter() - start
+    print('{w:>8} workers: {s:8.3f}s  {r:8.1f} MB/s'.format(w='serial', s=serial, r=args['input_mb'] / serial))
+
+    workers = 1
+    while workers <= args['max_workers']:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            # Warm up the pool so process start-up is not measured
+            list(executor.map(abs, range(workers)))
+            start = time.perf_counter()
+            result = run_chunk_parallel(func, text, {}, executor, parts=workers)
+            elapsed = time.perf_counter() - start
+        assert result == expected
+        print('{w:>8} workers: {s:8.3f}s  {r:8.1f} MB/s  {x:5.2f}x'.format(
+            w=workers, s=elapsed, r=args['input_mb'] / elapsed, x=serial / elapsed))
+        workers *= 2
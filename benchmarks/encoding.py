@@ -0,0 +1,85 @@
+import argparse
+import base64
+import hashlib
+import os
+import time
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.synthetic import WORDS
+from pyppeteer.symbols import symbols_enc, symbols_encr
+from pyppeteer.symbols.protocol import call_symbol
+
+ENC = dict(symbols_enc.SYMBOLS)
+ENCR = dict(symbols_encr.SYMBOLS)
+
+# (name, symbol, named args, naive whole-string equivalent)
+CASES = [
+    ('base64', ENC['base64'], {}, base64.b64encode),
+    ('base64 decode', ENC['base64'], {'decode': 'true'}, None),
+    ('hex', ENC['hex'], {}, bytes.hex),
+    ('url', ENC['url'], {}, lambda data: urllib.parse.quote_from_bytes(data, safe='')),
+    ('url decode', ENC['url'], {'decode': 'true'}, urllib.parse.unquote_to_bytes),
+    ('sha256', ENCR['hash'], {}, lambda data: hashlib.sha256(data).hexdigest()),
+    ('blake2b', ENCR['hash'], {'algorithm': 'blake2b'}, lambda data: hashlib.blake2b(data).hexdigest()),
+    ('crc32', ENCR['hash'], {'algorithm': 'crc32'}, None),
+]
+
+
+def make_data(size: int, kind: str) -> bytes:
+    if kind == 'random':
+        return os.urandom(size)
+    text = ' '.join(WORDS).encode('utf-8') + b'\n'
+    return (text * (size // len(text) + 1))[:size]
+
+
+def run(symbol, data: bytes, named_args: dict) -> float:
+    # The streaming symbols get the input as a memoryview, the way Stream.load(binary="true") hands it on
+    start = time.perf_counter()
+    for _ in call_symbol(symbol, memoryview(data), named_args):
+        pass
+    return time.perf_counter() - start
+
+
+def run_naive(func, data: bytes) -> float:
+    start = time.perf_counter()
+    func(data)
+    return time.perf_counter() - start
+
+
+def threaded_hash(data: bytes, threads: int) -> float:
+    # Independent statements run in a thread pool, hashing only scales if it releases the GIL
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        list(executor.map(lambda _: run(ENCR['hash'], data, {}), range(threads)))
+    return time.perf_counter() - start
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Throughput of the streaming Enc and Encr symbols')
+    parser.add_argument('-s', '--size', type=int, default=64, help='Input size in MB')
+    parser.add_argument('-r', '--repeat', type=int, default=3, help='Runs per case, the fastest one is reported')
+    parser.add_argument('-t', '--threads', type=int, default=4, help='Concurrent hashes for the thread pool test')
+    args = vars(parser.parse_args())
+    size = args['size'] * 1000000
+
+    for kind in ('text', 'random'):
+        data = make_data(size, kind)
+        print('{k} input, {m:.0f} MB            streaming      naive'.format(k=kind, m=size / 1e6))
+        for name, symbol, named_args, naive in CASES:
+            source = data
+            if name == 'base64 decode':
+                source = base64.encodebytes(data)
+            elif name == 'url decode':
+                source = urllib.parse.quote_from_bytes(data).encode('ascii')
+            elapsed = min(run(symbol, source, named_args) for _ in range(args['repeat']))
+            line = '{n:>14}: {s:10.1f} MB/s'.format(n=name, s=len(source) / elapsed / 1e6)
+            if naive is not None:
+                naive_elapsed = min(run_naive(naive, source) for _ in range(args['repeat']))
+                line += ' {s:10.1f} MB/s'.format(s=len(source) / naive_elapsed / 1e6)
+            print(line)
+
+    sequential = run(ENCR['hash'], data, {}) * args['threads']
+    elapsed = threaded_hash(data, args['threads'])
+    print('{t} concurrent sha256 in a thread pool: {s:.2f}x the sequential throughput'.format(
+        t=args['threads'], s=sequential / elapsed))
@@ -0,0 +1,38 @@
+import argparse
+import random
+import time
+
+from benchmarks.synthetic import WORDS
+from pyppeteer.symbols.protocol import call_symbol
+from pyppeteer.symbols.symbols_list import OUTPUTS, convert
+
+
+def make_list(item_count: int, items_per_line: int, separator: str = ';', seed: int = 0) -> str:
+    """
+    List-shaped text with item_count items, items_per_line of them on each line
+    """
+    rnd = random.Random(seed)
+    lines = [separator.join(rnd.choice(WORDS) + str(rnd.randrange(1000)) for _ in range(items_per_line))
+             for _ in range(1024)]
+    return '\n'.join(lines[i % len(lines)] for i in range(item_count // items_per_line)) + '\n'
+
+
+def run(text: str, output: str) -> (int, float):
+    start = time.perf_counter()
+    size = sum(len(chunk) for chunk in call_symbol(convert, text, {'output': output, 'list_sep': 'auto'}))
+    return size, time.perf_counter() - start
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Throughput of List.convert on large lists')
+    parser.add_argument('-n', '--items', type=int, default=2000000, help='Number of list items')
+    parser.add_argument('-r', '--repeat', type=int, default=3, help='Runs per output, the fastest one is reported')
+    args = vars(parser.parse_args())
+
+    for items_per_line in (1, 10):
+        text = make_list(args['items'], items_per_line)
+        print('{n:,} items, {p} per line, {b:.1f} MB'.format(n=args['items'], p=items_per_line, b=len(text) / 1e6))
+        for output in OUTPUTS:
+            size, elapsed = min((run(text, output) for _ in range(args['repeat'])), key=lambda r: r[1])
+            print('{o:>8}: {s:7.3f}s  {r:12,.0f} items/s  {m:7.1f} MB/s out'.format(
+                o=output, s=elapsed, r=args['items'] / elapsed, m=size / elapsed / 1e6))
@@ -0,0 +1,49 @@
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from pyppeteer.parser import ShowImageNode, ShowTextNode
+from pyppeteer.render import FORMATS, Renderer
+
+
+def make_layers(workdir: str, width: int, height: int, seconds: int, lines_per_second: float) -> list:
+    """
+    Dialogue scene: a full-frame background, a semi-transparent overlay and a sequence of subtitles on top
+    """
+    rnd = np.random.default_rng(0)
+    background = os.path.join(workdir, 'background.npy')
+    np.save(background, rnd.integers(0, 256, (height, width, 3), dtype=np.uint8))
+    overlay = os.path.join(workdir, 'overlay.npy')
+    np.save(overlay, rnd.integers(0, 256, (height // 4, width // 4, 4), dtype=np.uint8))
+
+    layers = [ShowImageNode(background, start=0, duration=seconds),
+              ShowImageNode(overlay, start=0, duration=seconds, x=20, y=20)]
+    line_seconds = 1 / lines_per_second
+    layers += [ShowTextNode('Line {n} of the dialogue'.format(n=n), start=n * line_seconds, duration=line_seconds)
+               for n in range(int(seconds * lines_per_second))]
+    return layers
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Frames per second of the renderer')
+    parser.add_argument('-d', '--dimensions', default='1920,1080', help='Frame size, e.g., 1920,1080')
+    parser.add_argument('-s', '--seconds', type=int, default=10, help='Length of the clip')
+    parser.add_argument('--fps', type=int, default=25, help='Frame rate of the clip')
+    args = vars(parser.parse_args())
+
+    width, height = (int(d) for d in args['dimensions'].split(','))
+    with tempfile.TemporaryDirectory() as workdir:
+        # One subtitle per second reuses most frames, one per frame forces compositing every frame
+        for name, lines_per_second in (('subtitles', 1), ('every frame', args['fps'])):
+            layers = make_layers(workdir, width, height, args['seconds'], lines_per_second)
+            for fmt in FORMATS:
+                renderer = Renderer(width, height, args['fps'])
+                with open(os.devnull, 'wb') as out:
+                    start = time.perf_counter()
+                    frames = renderer.render(layers, out, fmt)
+                    elapsed = time.perf_counter() - start
+                print('{n:>12} {f:>4}: {c:4} frames ({k} composited) in {s:6.2f}s  {r:7.1f} fps'.format(
+                    n=name, f=fmt, c=frames, k=renderer.composited, s=elapsed, r=frames / elapsed))
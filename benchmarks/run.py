@@ -0,0 +1,134 @@
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Callable
+
+from benchmarks.synthetic import make_script, make_text
+from pyppeteer.generator import FilterLayerGenerator
+from pyppeteer.parser import Parser
+from pyppeteer.scanner import Scanner
+
+
+def _tokenize(script: str) -> int:
+    scanner = Scanner()
+    scanner.scan_str(script)
+    count = 0
+    while scanner.next_token() is not None:
+        count += 1
+    return count
+
+
+def _execute(script: str) -> int:
+    generator = FilterLayerGenerator()
+    for statement in Parser().parse(script):
+        generator.generate(statement)
+    return sum(len(chunk) for chunk in generator.iter_output())
+
+
+def _select(path: str, lazy: bool) -> int:
+    script = 'Stream.load(file="{f}"{l})\nStream.select(from="1000",to="1030")\n'.format(
+        f=path, l=',lazy="true"' if lazy else '')
+    return len(FilterLayerGenerator().compile(Parser().parse(script)).run())
+
+
+def measure(func: Callable, repeat: int) -> dict:
+    """
+    Fastest wall time of repeat runs, peak traced memory is measured in an extra run
+    """
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    tracemalloc.start()
+    func()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {'seconds': best, 'peak_bytes': peak, 'result': result}
+
+
+def run_scenarios(args: dict, workdir: str) -> dict:
+    input_path = os.path.join(workdir, 'input.txt')
+    input_bytes = make_text(input_path, args['input_mb'] * 1024 * 1024)
+    script = make_script(args['statements'], arg_count=args['arg_count'], string_length=args['string_length'],
+                         comment_density=args['comment_density'])
+    exec_script = make_script(args['exec_statements'], load_file=input_path)
+    script_mb = len(script) / (1024 * 1024)
+
+    results = {}
+    r = measure(lambda: _tokenize(script), args['repeat'])
+    r.update(tokens_per_s=r['result'] / r['seconds'], MB_per_s=script_mb / r['seconds'])
+    results['tokenize'] = r
+
+    r = measure(lambda: len(Parser().parse(script)), args['repeat'])
+    r.update(statements_per_s=r['result'] / r['seconds'], MB_per_s=script_mb / r['seconds'])
+    results['parse'] = r
+
+    r = measure(lambda: _execute(exec_script), args['repeat'])
+    r.update(statements_per_s=(args['exec_statements'] + 1) / r['seconds'],
+             MB_per_s=input_bytes / (1024 * 1024) / r['seconds'])
+    results['execute'] = r
+
+    for name, lazy in (('select', False), ('select_lazy', True)):
+        r = measure(lambda: _select(input_path, lazy), args['repeat'])
+        r.update(MB_per_s=input_bytes / (1024 * 1024) / r['seconds'])
+        results[name] = r
+
+    for r in results.values():
+        del r['result']
+    return results
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> bool:
+    """
+    Print the change against a baseline, returns False if any scenario got slower than threshold
+    """
+    ok = True
+    for name, r in results.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        change = r['seconds'] / base['seconds'] - 1
+        regressed = change > threshold
+        ok = ok and not regressed
+        print('{n:>12}: {c:+7.1%} time, {m:+7.1%} peak memory{f}'.format(
+            n=name, c=change, m=r['peak_bytes'] / max(base['peak_bytes'], 1) - 1, f='  REGRESSION' if regressed else ''))
+    return ok
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Scanner, parser and generator throughput benchmarks')
+    parser.add_argument('-n', '--statements', type=int, default=20000, help='Statements for tokenize/parse')
+    parser.add_argument('--exec-statements', type=int, default=20, help='Statements for end-to-end execution')
+    parser.add_argument('--arg-count', type=int, default=2, help='Additional named arguments per statement')
+    parser.add_argument('--string-length', type=int, default=8, help='Length of additional argument values')
+    parser.add_argument('--comment-density', type=float, default=0.1, help='Share of comment lines')
+    parser.add_argument('--input-mb', type=int, default=16, help='Size of the synthetic input text in MiB')
+    parser.add_argument('-r', '--repeat', type=int, default=3, help='Runs per scenario, the fastest one is reported')
+    parser.add_argument('--json', help='Write results as JSON to this file')
+    parser.add_argument('--baseline', help='Compare against a JSON file written by --json')
+    parser.add_argument('--threshold', type=float, default=0.1, help='Allowed slowdown against the baseline')
+    args = vars(parser.parse_args())
+
+    with tempfile.TemporaryDirectory() as workdir:
+        results = run_scenarios(args, workdir)
+
+    for name, r in results.items():
+        rates = ', '.join('{v:,.1f} {k}'.format(k=k.replace('_per_', '/'), v=v)
+                          for k, v in r.items() if '_per_' in k)
+        print('{n:>12}: {s:8.3f}s  {p:8.1f} MiB peak  {r}'.format(
+            n=name, s=r['seconds'], p=r['peak_bytes'] / (1024 * 1024), r=rates))
+
+    if args['json']:
+        with open(args['json'], 'w') as file:
+            json.dump({'params': args, 'results': results}, file, indent=2)
+
+    if args['baseline']:
+        with open(args['baseline'], 'r') as file:
+            if not compare(results, json.load(file)['results'], args['threshold']):
+                sys.exit(1)
@@ -0,0 +1,30 @@
+import argparse
+import time
+
+from benchmarks.legacy_scanner import LegacyScanner
+from benchmarks.synthetic import make_script
+from pyppeteer.scanner import Scanner
+
+
+def run(scanner_cls, script: str) -> (int, float):
+    start = time.perf_counter()
+    scanner = scanner_cls()
+    scanner.scan_str(script)
+    count = 0
+    while scanner.next_token() is not None:
+        count += 1
+    return count, time.perf_counter() - start
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Compare tokenizer throughput of the legacy and regex scanner')
+    parser.add_argument('-n', '--statements', type=int, default=50000, help='Number of statements to generate')
+    parser.add_argument('-r', '--repeat', type=int, default=3, help='Runs per scanner, the fastest one is reported')
+    args = vars(parser.parse_args())
+
+    script = make_script(args['statements'])
+    print('Script: {n} statements, {b} characters'.format(n=args['statements'], b=len(script)))
+    for scanner_cls in (LegacyScanner, Scanner):
+        tokens, elapsed = min((run(scanner_cls, script) for _ in range(args['repeat'])), key=lambda r: r[1])
+        print('{name:>14}: {t} tokens in {s:.3f}s ({r:,.0f} tokens/s)'.format(
+            name=scanner_cls.__name__, t=tokens, s=elapsed, r=tokens / elapsed))
@@ -0,0 +1,60 @@
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules a script using only Stream must not import, see pyppeteer.symbols.symbols.SymbolRegistry.
+# Services behind command line options are only imported when the option is given
+UNUSED_MODULES = ('pyppeteer.symbols.symbols_list', 'asyncio', 'pyppeteer.server', 'multiprocessing',
+                  'pyppeteer.instrumentation', 'pyppeteer.result_cache', 'pyppeteer.memory_governor',
+                  'pyppeteer.parse_cache', 'pyppeteer.optimizer', 'tracemalloc', 'tempfile', 'hashlib')
+
+
+def wall_time(command: [str], repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run(command, cwd=ROOT, stdout=subprocess.DEVNULL, check=True)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def imported_modules(command: [str]) -> set[str]:
+    result = subprocess.run([command[0], '-X', 'importtime'] + command[1:], cwd=ROOT, stdout=subprocess.DEVNULL,
+                            stderr=subprocess.PIPE, text=True, check=True)
+    return {line.rsplit('|', 1)[1].strip() for line in result.stderr.splitlines() if line.startswith('import time:')}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Startup time of main.py on a trivial script, beyond the bare '
+                                                 'interpreter start. Exits with 1 if the budget is exceeded.')
+    parser.add_argument('-r', '--repeat', type=int, default=10, help='Runs per measurement, the median is reported')
+    parser.add_argument('--budget-ms', type=float, default=120.0, help='Allowed startup overhead in milliseconds')
+    args = vars(parser.parse_args())
+
+    with tempfile.TemporaryDirectory() as workdir:
+        script = os.path.join(workdir, 'startup.pym')
+        with open(script, 'w') as file:
+            file.write('Stream.load(raw="x")\n')
+        main = [sys.executable, 'main.py', '-f', script]
+
+        interpreter = wall_time([sys.executable, '-c', 'pass'], args['repeat'])
+        total = wall_time(main, args['repeat'])
+        unexpected = sorted(set(UNUSED_MODULES) & imported_modules(main))
+
+    overhead = (total - interpreter) * 1000
+    print('interpreter: {i:.1f} ms, main.py: {t:.1f} ms, overhead: {o:.1f} ms (budget {b:.0f} ms)'.format(
+        i=interpreter * 1000, t=total * 1000, o=overhead, b=args['budget_ms']))
+    failed = False
+    if unexpected:
+        print('imported although unused: ' + ', '.join(unexpected))
+        failed = True
+    if overhead > args['budget_ms']:
+        print('startup budget exceeded')
+        failed = True
+    sys.exit(1 if failed else 0)
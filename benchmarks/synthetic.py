@@ -0,0 +1,49 @@
+import random
+
+# (module, method, required named args) used for generated statements, all of them run on any input
+METHODS = [('Stream', 'select', [('from', '0')]),
+           ('List', 'convert', [('output', 'csv'), ('sep', ';'), ('list_sep', 'auto')])]
+
+WORDS = ['lorem', 'ipsum', 'dolor', 'sit', 'amet', 'consectetur', 'adipiscing', 'elit', 'sed', 'do']
+
+
+def make_script(statement_count: int, arg_count: int = 2, string_length: int = 8, comment_density: float = 0.1,
+                load_file: str = None, seed: int = 0) -> str:
+    """
+    Generate a syntactically valid .pym script
+    :param statement_count: Number of method call statements
+    :param arg_count: Additional named arguments per statement
+    :param string_length: Length of each additional argument value
+    :param comment_density: Probability of a comment line before each statement
+    :param load_file: Start with Stream.load(file=...) so the script can be executed
+    :param seed: Random seed, equal parameters always produce the same script
+    """
+    rnd = random.Random(seed)
+    lines = []
+    if load_file:
+        lines.append('Stream.load(file="{f}")'.format(f=load_file))
+    for i in range(statement_count):
+        if rnd.random() < comment_density:
+            lines.append('# ' + ' '.join(rnd.choice(WORDS) for _ in range(6)))
+        module, method, args = METHODS[i % len(METHODS)]
+        args = args + [('arg{n}'.format(n=n), ''.join(rnd.choice('abcdefghij') for _ in range(string_length)))
+                       for n in range(arg_count)]
+        lines.append('{m}.{f}({a})'.format(m=module, f=method, a=','.join('{k}="{v}"'.format(k=k, v=v)
+                                                                          for k, v in args)))
+    return '\n'.join(lines) + '\n'
+
+
+def make_text(path: str, size_bytes: int, words_per_line: int = 12, seed: int = 0) -> int:
+    """
+    Write a synthetic ;-separated text file of roughly size_bytes bytes
+    :return: Number of bytes written
+    """
+    rnd = random.Random(seed)
+    lines = [';'.join(rnd.choice(WORDS) for _ in range(words_per_line)) + '\n' for _ in range(1024)]
+    written = 0
+    with open(path, 'w') as file:
+        while written < size_bytes:
+            line = lines[written % len(lines)]
+            file.write(line)
+            written += len(line)
+    return written
@@ -1,35 +1,287 @@
 import argparse
+import logging
+import os
+import sys
+# Pool classes are looked up on use, importing the process pool machinery is only paid for by modes needing it
+import concurrent.futures as futures
 from sys import argv
-from pyppeteer.exceptions import InvalidOrNoInputStream
+from typing import Iterable
+from pyppeteer.exceptions import GenerateMemoryLimitExceeded, InvalidOrNoInputStream
 from pyppeteer.generator import FilterLayerGenerator
 from pyppeteer.parser import Parser
+from pyppeteer.symbols.protocol import iter_chunks
+
+
+def make_parser(args: dict) -> Parser:
+    if args['cache_dir']:
+        from pyppeteer.parse_cache import ParseCache
+        return Parser(cache=ParseCache(args['cache_dir'], max_bytes=args['cache_size'] * 1024 * 1024))
+    return Parser()
+
+
+def report_cache(parser: Parser, args: dict):
+    if args['cache_dir']:
+        if args['cache_stats']:
+            print('parse cache: {s}'.format(s=parser.cache.stats()), file=sys.stderr)
+        parser.cache.flush_stats()
+
+
+def write_output(args: dict, chunks: Iterable):
+    # Binary pipelines hand over bytes chunks, text chunks are encoded
+    if args['output']:
+        out_file = open(args['output'], 'wb')
+    else:
+        sys.stdout.flush()
+        out_file = sys.stdout.buffer
+    try:
+        for chunk in chunks:
+            out_file.write(chunk.encode('utf-8') if isinstance(chunk, str) else chunk)
+    finally:
+        if out_file is not sys.stdout.buffer:
+            out_file.close()
+        else:
+            out_file.flush()
 
-if __name__ == '__main__':
-    parser = argparse.ArgumentParser(description='Pyppeteer - a simple DSL to create video dialogues')
-    parser.add_argument('-f', '--file', help='Input file to parse', required=True)
-    parser.add_argument('-d', '--dimensions', help='Video dimensions, e.g., 1920,1080')
-    args = vars(parser.parse_args())
 
-    if len(argv) > 1 and args['file']:
-        parser = Parser()
+def run_script(args: dict):
+    parser = make_parser(args)
 
-        # Load file into string
-        with open(args['file'], 'r') as file:
-            input_stream = file.read()
+    with open(args['file'], 'r') as file:
+        if args['cache_dir']:
+            statements = parser.parse(file.read())
+        else:
+            # Statements are parsed lazily while the file is read and executed as soon as they are complete
+            statements = parser.iter_parse(file)
 
-            statements = parser.parse(input_stream)
-            generator = FilterLayerGenerator()
+        if args['optimize'] or args['explain']:
+            from pyppeteer.optimizer import Optimizer
+            optimizer = Optimizer()
+            statements = optimizer.optimize(statements)
+            if args['explain']:
+                print(optimizer.explain(statements))
+                return
+        # Services are imported by the runs using them, a plain run does not pay for the profiler or the cache
+        profiler = None
+        if args['profile']:
+            from pyppeteer.instrumentation import Profiler
+            profiler = Profiler(trace_memory=args['profile_memory'])
+        result_cache = None
+        if args['memoize_dir']:
+            from pyppeteer.result_cache import ResultCache
+            result_cache = ResultCache(directory=args['memoize_dir'])
+        chunk_executor = futures.ProcessPoolExecutor(max_workers=args['jobs']) if args['data_parallel'] else None
+        memory = None
+        if args['max_memory']:
+            from pyppeteer.memory_governor import MemoryGovernor
+            memory = MemoryGovernor(args['max_memory'] * 1024 * 1024, directory=args['spill_dir'])
+        generator = FilterLayerGenerator(instrumentation=profiler, result_cache=result_cache,
+                                         chunk_executor=chunk_executor, memory=memory)
 
-            try:
-                for statement in statements:
-                    generator.generate(statement)
-            except TypeError as e:
-                raise Exception(e)
+        # The chunk workers are shut down and spill files removed on every path out of the pipeline, including errors
+        try:
+            if args['parallel']:
+                # Independent named streams run concurrently
+                pool_cls = futures.ProcessPoolExecutor if args['processes'] else futures.ThreadPoolExecutor
+                with pool_cls(max_workers=args['jobs']) as executor:
+                    output = generator.compile(statements).run_parallel(executor=executor)
+                write_output(args, iter_chunks(output))
+            else:
+                try:
+                    for statement in statements:
+                        generator.generate(statement)
+                except TypeError as e:
+                    raise Exception(e)
+                except GenerateMemoryLimitExceeded as e:
+                    # Raised before the statement runs, nothing was written yet
+                    print('error: {e}'.format(e=e), file=sys.stderr)
+                    sys.exit(1)
 
-            # Render and export the final movie
+                # Chunked pipelines only run while their output is consumed
+                write_output(args, generator.iter_output())
+
+            # Render and export the final movie, layers may still read spilled streams
             dims = (1920, 1080)
             if args['dimensions']:
                 dims = tuple(args['dimensions'].split(','))
-            generator.render(dims)
+            frames = generator.render(dims, args['video'], fps=args['fps'])
+            if frames:
+                print('rendered {n} frames to {v}'.format(n=frames, v=args['video']), file=sys.stderr)
+        finally:
+            if chunk_executor:
+                chunk_executor.shutdown()
+            if memory:
+                memory.close()
+    report_cache(parser, args)
+    if result_cache and args['cache_stats']:
+        print('result cache: {s}'.format(s=result_cache.stats()), file=sys.stderr)
+
+    if profiler:
+        profiler.write_trace(args['profile'])
+        print(profiler.summary(), file=sys.stderr)
+
+    if memory and args['memory_stats']:
+        print(memory.summary(), file=sys.stderr)
+
+
+# Engines of the other modes are imported by their run_*_mode function, so a plain run does not pay for them
+def run_async_mode(args: dict):
+    import asyncio
+    from pyppeteer.async_generator import AsyncFilterLayerGenerator
+    with open(args['file'], 'r') as file, AsyncFilterLayerGenerator(max_workers=args['jobs'] or 4) as generator:
+        output = asyncio.run(generator.run(Parser().iter_parse(file)))
+
+    write_output(args, iter_chunks(output))
+
+
+def run_batch_mode(args: dict):
+    from pyppeteer.batch import expand_inputs, run_batch
+
+    # The script is parsed once, every worker process compiles it once for all its inputs
+    parser = make_parser(args)
+    with open(args['file'], 'r') as file:
+        statements = parser.parse(file.read())
+    report_cache(parser, args)
+
+    inputs = expand_inputs(args['inputs'])
+    summary = run_batch(statements, inputs, args['output_dir'], jobs=args['jobs'])
+    print('{s}/{t} inputs succeeded, {f} failed (see {d}/summary.json)'.format(
+        s=summary['succeeded'], t=summary['total'], f=summary['failed'], d=args['output_dir']), file=sys.stderr)
+    if summary['failed']:
+        sys.exit(1)
+
+
+def run_scripts_mode(args: dict):
+    from pyppeteer.batch import expand_inputs, output_paths
+    from pyppeteer.prefix_trie import PrefixTrie
+
+    # Statements shared by several scripts at their start are executed once, see pyppeteer.prefix_trie
+    parser = make_parser(args)
+    paths = expand_inputs(args['scripts'])
+    trie = PrefixTrie()
+    for path in paths:
+        with open(path, 'r') as file:
+            trie.add(parser.parse(file.read()))
+    report_cache(parser, args)
+
+    out_paths = output_paths(paths, args['output_dir']) if paths else []
+    failed = []
+
+    def on_output(index: int, stream):
+        os.makedirs(os.path.dirname(out_paths[index]), exist_ok=True)
+        write_output({'output': out_paths[index]}, iter_chunks(stream))
+
+    def on_error(index: int, error: Exception):
+        failed.append(index)
+        print('{p}: {t}: {e}'.format(p=paths[index], t=type(error).__name__, e=error), file=sys.stderr)
+
+    executed = trie.run(on_output, on_error)
+    print('{n} scripts: {e} of {t} statements executed, {s} saved by shared prefixes, {f} failed'.format(
+        n=trie.script_count, e=executed, t=trie.statement_count, s=trie.statement_count - executed,
+        f=len(failed)), file=sys.stderr)
+    if failed:
+        sys.exit(1)
+
+
+def run_watch_mode(args: dict):
+    from pyppeteer.watch import IncrementalRunner, watch
+
+    runner = IncrementalRunner(max_snapshot_bytes=args['watch_memory'] * 1024 * 1024)
+
+    def on_change(script: str):
+        try:
+            output = runner.update(script)
+        except Exception as e:
+            # Keep watching, the next edit may fix the script
+            print('error: {t}: {e}'.format(t=type(e).__name__, e=e), file=sys.stderr)
+            return
+        write_output(args, iter_chunks(output))
+        # Start the report on a new line after output written to the terminal
+        print('{nl}ran {n} statements from statement {s}, snapshots hold {b:,} bytes'.format(
+            nl='' if args['output'] else '\n', n=runner.last_executed, s=runner.last_resumed,
+            b=runner.snapshot_bytes()), file=sys.stderr)
+
+    try:
+        watch(args['file'], on_change, interval=args['watch_interval'])
+    except KeyboardInterrupt:
+        pass
+
+
+def run_server_mode(args: dict):
+    from pyppeteer.server import PLAN_CACHE_SIZE, serve
+
+    # Scripts are sent by pyppeteer.client, see pyppeteer.server
+    serve(args['serve'], jobs=args['jobs'], cache_size=args['plan_cache'] or PLAN_CACHE_SIZE)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Pyppeteer - a simple DSL to create video dialogues')
+    parser.add_argument('-f', '--file', help='Input file to parse')
+    parser.add_argument('-d', '--dimensions', help='Video dimensions, e.g., 1920,1080')
+    parser.add_argument('-o', '--output', help='Write the resulting text stream to this file instead of stdout')
+    parser.add_argument('--video', help='Render the layers added by Std.show_text/show_image to this file, '
+                                        'Y4M for *.y4m, raw rgb24 otherwise')
+    parser.add_argument('--fps', type=int, help='Frames per second of --video (default: 25)')
+    parser.add_argument('-i', '--inputs', help='Batch mode: glob pattern or list file of inputs to run the script on')
+    parser.add_argument('-j', '--jobs', type=int, help='Batch mode: number of worker processes (default: all cores)')
+    parser.add_argument('--async', action='store_true',
+                        help='Run on the asyncio engine, file loads are prefetched concurrently (--jobs threads)')
+    parser.add_argument('--parallel', action='store_true',
+                        help='Run independent named streams concurrently on --jobs threads')
+    parser.add_argument('--processes', action='store_true', help='Use processes instead of threads for --parallel')
+    parser.add_argument('--data-parallel', action='store_true',
+                        help='Split large inputs of chunk-parallel symbols across --jobs processes')
+    parser.add_argument('--scripts',
+                        help='Run many scripts (glob pattern or list file) executing their shared prefixes once, '
+                             'results go to --output-dir')
+    parser.add_argument('--output-dir', default='output',
+                        help='Batch and --scripts mode: directory for per-input / per-script results')
+    parser.add_argument('--cache-dir', help='Cache parsed scripts in this directory, keyed by their content hash')
+    parser.add_argument('--cache-size', type=int, default=64, help='Maximum size of the parse cache in MiB')
+    parser.add_argument('--cache-stats', action='store_true', help='Print parse and result cache counters to stderr')
+    parser.add_argument('-O', '--optimize', action='store_true', help='Rewrite the script before execution')
+    parser.add_argument('--explain', action='store_true', help='Print the optimized plan instead of running it')
+    parser.add_argument('--memoize-dir', help='Cache statement results on disk, keyed by their input and arguments')
+    parser.add_argument('--profile', help='Write a per-statement Chrome trace-event JSON to this file')
+    parser.add_argument('--profile-memory', action='store_true',
+                        help='Also record allocation deltas with tracemalloc (--profile), this slows every statement '
+                             'down, so wall and CPU times are only comparable between runs with the same setting')
+    parser.add_argument('--max-memory', type=int,
+                        help='Memory budget for intermediate streams in MiB, larger streams are spilled to disk')
+    parser.add_argument('--spill-dir', help='Directory for streams spilled by --max-memory (default: system temp)')
+    parser.add_argument('--memory-stats', action='store_true',
+                        help='Print the peak resident intermediate size of every statement to stderr (--max-memory)')
+    parser.add_argument('--watch', action='store_true',
+                        help='Re-run the script whenever it changes, starting from the first changed statement')
+    parser.add_argument('--watch-interval', type=float, default=0.5, help='Watch mode: polling interval in seconds')
+    parser.add_argument('--watch-memory', type=int, default=256,
+                        help='Watch mode: MiB of intermediate streams kept to resume from')
+    parser.add_argument('--serve', metavar='ADDRESS',
+                        help='Server mode: run scripts sent by pyppeteer.client on --jobs warm worker processes, '
+                             'ADDRESS is host:port or unix:<socket path>')
+    parser.add_argument('--plan-cache', type=int, help='Server mode: compiled scripts kept per worker (default: 256)')
+    parser.add_argument('-v', '--verbose', action='store_true', help='Log every executed statement')
+    args = vars(parser.parse_args())
+    if args['parallel']:
+        # run_parallel executes the dataflow graph directly, without the per-statement services of a sequential run
+        unsupported = [option for option in ('--profile', '--memoize-dir', '--max-memory', '--data-parallel', '--video')
+                       if args[option[2:].replace('-', '_')]]
+        if unsupported:
+            parser.error('--parallel cannot be combined with ' + ', '.join(unsupported))
+
+    logging.basicConfig(level=logging.DEBUG if args['verbose'] else logging.WARNING)
+
+    if args['serve']:
+        run_server_mode(args)
+    elif args['scripts']:
+        run_scripts_mode(args)
+    elif len(argv) > 1 and args['file']:
+        if args['inputs']:
+            run_batch_mode(args)
+        elif args['async']:
+            run_async_mode(args)
+        elif args['watch']:
+            run_watch_mode(args)
+        else:
+            run_script(args)
     else:
         raise InvalidOrNoInputStream('Invalid input stream')
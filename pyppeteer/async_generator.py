@@ -0,0 +1,104 @@
+import asyncio
+import inspect
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable, Mapping, Optional
+
+from pyppeteer.exceptions import GenerateInvalidSequence
+from pyppeteer.generator import FilterLayerGenerator
+from pyppeteer.parser import MethodCallNode, StatementNode
+from pyppeteer.symbols.protocol import Stream, call_symbol, materialize
+
+
+class AsyncFilterLayerGenerator(FilterLayerGenerator):
+    """
+    asyncio variant of the generator: symbols may be async def, blocking symbols run in a bounded thread pool
+    and symbols declaring protocol.prefetch (e.g., Stream.load(file=...)) start their I/O as soon as the statement
+    is parsed, so it overlaps with the execution of earlier statements.
+    """
+
+    def __init__(self, max_workers: int = 4):
+        super().__init__()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    async def run(self, statements: Iterable[StatementNode], input_stream: Stream = '') -> Stream:
+        """
+        Execute statements (e.g., a Parser.iter_parse iterator) and return the final stream
+        """
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        producer = asyncio.create_task(self._produce(statements, queue))
+
+        stream = input_stream
+        try:
+            while (item := await queue.get()) is not None:
+                if isinstance(item, Exception):
+                    raise item
+                func, named_args, prefetched = item
+                fetched = await prefetched if prefetched else None
+                if fetched is not None:
+                    stream = fetched
+                elif inspect.iscoroutinefunction(func):
+                    stream = await func(materialize(stream), named_args)
+                else:
+                    stream = await loop.run_in_executor(self._executor, self._call_blocking, func, stream,
+                                                        named_args)
+        finally:
+            producer.cancel()
+            # Prefetches of statements that were not reached (e.g., after a failing statement) are cancelled, the
+            # ones already running in the pool are awaited so no failure is left unretrieved
+            pending = []
+            while not queue.empty():
+                item = queue.get_nowait()
+                if isinstance(item, tuple) and item[2] is not None:
+                    item[2].cancel()
+                    pending.append(item[2])
+            # A cancellation of run() itself propagates once the finally block is done
+            await asyncio.gather(producer, *pending, return_exceptions=True)
+        return stream
+
+    async def run_many(self, scripts: Iterable[Iterable[StatementNode]]) -> [Stream]:
+        """
+        Execute several scripts concurrently, all their prefetches share the thread pool
+        """
+        return await asyncio.gather(*(self.run(statements) for statements in scripts))
+
+    async def _produce(self, statements: Iterable[StatementNode], queue: asyncio.Queue):
+        loop = asyncio.get_running_loop()
+        try:
+            for statement in statements:
+                if type(statement.node) != MethodCallNode:
+                    raise GenerateInvalidSequence('Invalid node {n}'.format(n=statement.node))
+                if statement.node.into or statement.node.sources:
+                    raise GenerateInvalidSequence('Named streams are not supported by the async engine')
+                step = self._resolve(statement.node)
+                if step:
+                    func, named_args = step
+                    await queue.put((func, named_args, self._prefetch(loop, func, named_args)))
+                # Let the consumer run between statements
+                await asyncio.sleep(0)
+        except Exception as e:
+            # Raised by the consumer once it reaches the failing statement. CancelledError is no Exception and
+            # reaches run(), which cancels the producer when it stops early
+            await queue.put(e)
+        await queue.put(None)
+
+    def _prefetch(self, loop: asyncio.AbstractEventLoop, func: Callable,
+                  named_args: Mapping) -> Optional[asyncio.Future]:
+        fetch = getattr(func, 'prefetch', None)
+        if fetch is None:
+            return None
+        return loop.run_in_executor(self._executor, fetch, named_args)
+
+    @staticmethod
+    def _call_blocking(func: Callable, stream: Stream, named_args: Mapping) -> Stream:
+        # Chunked pipelines are drained inside the worker thread, not on the event loop
+        return materialize(call_symbol(func, stream, named_args))
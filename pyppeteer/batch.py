@@ -0,0 +1,75 @@
+import glob
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+from pyppeteer.generator import ExecutionPlan, FilterLayerGenerator
+from pyppeteer.parser import StatementNode
+from pyppeteer.symbols.protocol import encode_chunks, iter_chunks, read_chunks
+
+# Compiled once per worker process by _init_worker
+_plan: Optional[ExecutionPlan] = None
+
+
+def expand_inputs(spec: str) -> [str]:
+    """
+    Resolve --inputs, either a glob pattern or a list file with one input path per line
+    """
+    if any(c in spec for c in '*?['):
+        return sorted(p for p in glob.glob(spec, recursive=True) if os.path.isfile(p))
+    with open(spec, 'r') as file:
+        return [ln.strip() for ln in file if ln.strip()]
+
+
+def output_paths(inputs: [str], output_dir: str) -> [str]:
+    # Mirror the directory layout below the common parent so equal file names do not collide
+    common = os.path.commonpath([os.path.dirname(os.path.abspath(p)) for p in inputs])
+    return [os.path.join(output_dir, os.path.relpath(os.path.abspath(p), common) + '.out') for p in inputs]
+
+
+def _init_worker(statements: [StatementNode]):
+    global _plan
+    _plan = FilterLayerGenerator().compile(statements)
+
+
+def _run_input(task: tuple[str, str]) -> Optional[str]:
+    in_path, out_path = task
+    try:
+        os.makedirs(os.path.dirname(out_path), exist_ok=True)
+        # Binary pipelines produce bytes chunks, text chunks are encoded
+        with open(out_path, 'wb') as out_file:
+            out_file.writelines(encode_chunks(iter_chunks(_plan.run(read_chunks(in_path)))))
+    except Exception as e:
+        if os.path.exists(out_path):
+            os.remove(out_path)
+        return '{t}: {e}'.format(t=type(e).__name__, e=e)
+    return None
+
+
+def run_batch(statements: [StatementNode], inputs: [str], output_dir: str, jobs: Optional[int] = None) -> dict:
+    """
+    Run one parsed script over many input files on a process pool.
+    Each input file is the initial stream of the script, its result is written to <output_dir>/<input>.out
+    and a summary.json with all failures is written to output_dir
+    :return: Summary dict
+    """
+    # Fail fast on symbol errors before any worker is started
+    FilterLayerGenerator().compile(statements)
+
+    jobs = jobs or os.cpu_count() or 1
+    tasks = list(zip(inputs, output_paths(inputs, output_dir))) if inputs else []
+    chunksize = max(1, min(256, len(tasks) // (jobs * 4)))
+
+    failures = []
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker, initargs=(statements,)) as executor:
+        for (in_path, _), error in zip(tasks, executor.map(_run_input, tasks, chunksize=chunksize)):
+            if error:
+                failures.append({'input': in_path, 'error': error})
+
+    summary = {'total': len(tasks), 'succeeded': len(tasks) - len(failures), 'failed': len(failures),
+               'failures': failures}
+    os.makedirs(output_dir, exist_ok=True)
+    with open(os.path.join(output_dir, 'summary.json'), 'w') as file:
+        json.dump(summary, file, indent=2)
+    return summary
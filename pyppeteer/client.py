@@ -0,0 +1,115 @@
+"""
+Thin client for a pyppeteer server (main.py --serve), only uses the standard library so it starts fast:
+
+    python -m pyppeteer.client -a unix:/tmp/pyppeteer.sock -f script.pym < input.txt > output.txt
+"""
+import argparse
+import json
+import os
+import socket
+import sys
+from http.client import HTTPConnection
+from typing import Optional
+
+DEFAULT_ADDRESS = 'localhost:8765'
+
+
+class ServerError(Exception):
+    pass
+
+
+def parse_address(address: str) -> tuple[str, Optional[int]]:
+    """
+    "unix:<path>" for a Unix domain socket, otherwise "<host>:<port>" (or just a port) on TCP
+    :return: (socket path, None) or (host, port)
+    """
+    if address.startswith('unix:'):
+        return address[len('unix:'):], None
+    host, _, port = address.rpartition(':')
+    return host or 'localhost', int(port)
+
+
+class _UnixConnection(HTTPConnection):
+    def __init__(self, path: str, timeout: Optional[float] = None):
+        super().__init__('localhost', timeout=timeout)
+        self._path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        if self.timeout is not None:
+            self.sock.settimeout(self.timeout)
+        self.sock.connect(self._path)
+
+
+def connect(address: str, timeout: Optional[float] = None) -> HTTPConnection:
+    host, port = parse_address(address)
+    if port is None:
+        return _UnixConnection(host, timeout=timeout)
+    return HTTPConnection(host, port, timeout=timeout)
+
+
+def _request(connection: HTTPConnection, method: str, path: str, body: Optional[bytes] = None) -> bytes:
+    headers = {'Content-Type': 'application/json'} if body is not None else {}
+    connection.request(method, path, body=body, headers=headers)
+    response = connection.getresponse()
+    data = response.read()
+    if response.status != 200:
+        try:
+            message = json.loads(data)['error']
+        except (ValueError, KeyError):
+            message = data.decode('utf-8', 'replace')
+        raise ServerError(message)
+    return data
+
+
+def run_remote(connection: HTTPConnection, script: str, input_text: str = '', cwd: Optional[str] = None) -> bytes:
+    """
+    Execute script on the server with input_text as initial stream, relative paths are resolved against cwd
+    :return: Output of the script
+    """
+    body = json.dumps({'script': script, 'input': input_text, 'cwd': cwd or os.getcwd()}).encode('utf-8')
+    return _request(connection, 'POST', '/run', body)
+
+
+def server_stats(connection: HTTPConnection) -> dict:
+    return json.loads(_request(connection, 'GET', '/stats'))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Run a script on a pyppeteer server')
+    parser.add_argument('-f', '--file', help='Script to run')
+    parser.add_argument('-a', '--address', default=DEFAULT_ADDRESS,
+                        help='Server address, host:port or unix:<socket path> (default: {d})'.format(d=DEFAULT_ADDRESS))
+    parser.add_argument('--input', help='File with the initial stream, "-" reads stdin (default: empty stream)')
+    parser.add_argument('-o', '--output', help='Write the resulting stream to this file instead of stdout')
+    parser.add_argument('--stats', action='store_true', help='Print the server counters instead of running a script')
+    args = vars(parser.parse_args())
+
+    conn = connect(args['address'])
+    try:
+        if args['stats']:
+            print(json.dumps(server_stats(conn), indent=2))
+            sys.exit(0)
+        if not args['file']:
+            parser.error('-f/--file is required')
+        with open(args['file'], 'r') as file:
+            script_text = file.read()
+        text = ''
+        if args['input'] == '-':
+            text = sys.stdin.read()
+        elif args['input']:
+            with open(args['input'], 'r') as file:
+                text = file.read()
+        try:
+            output = run_remote(conn, script_text, text)
+        except ServerError as e:
+            print('error: {e}'.format(e=e), file=sys.stderr)
+            sys.exit(1)
+    finally:
+        conn.close()
+
+    if args['output']:
+        with open(args['output'], 'wb') as file:
+            file.write(output)
+    else:
+        sys.stdout.buffer.write(output)
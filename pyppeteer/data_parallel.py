@@ -0,0 +1,113 @@
+import codecs
+import os
+from concurrent.futures import Executor
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+from typing import Callable, Mapping, Optional
+
+from pyppeteer.mapped_text import MappedText
+from pyppeteer.symbols.protocol import BINARY_TYPES, TEXT, Stream, call_symbol, materialize, to_text
+
+# Inputs smaller than this are not worth the process round trip
+MIN_PARALLEL_BYTES = 1 << 20
+
+_PROBE_SIZE = 1 << 12
+
+# Leading bytes of the input handed to a chunk_parallel prepare hook
+PREFIX_SIZE = 1 << 16
+
+
+def split_offsets(buffer: memoryview, parts: int, separator: bytes) -> list[tuple[int, int]]:
+    """
+    Byte ranges of about equal size, each one ending right after a separator (or at the end of the buffer)
+    """
+    size = len(buffer)
+    ranges = []
+    start = 0
+    for i in range(1, parts):
+        target = max(start, size * i // parts)
+        end = None
+        while target < size:
+            window = bytes(buffer[target:target + _PROBE_SIZE])
+            found = window.find(separator)
+            if found >= 0:
+                end = target + found + len(separator)
+                break
+            # Keep a separator cut by the window border
+            target += max(1, len(window) - len(separator) + 1)
+        if end is None or end >= size:
+            break
+        if end > start:
+            ranges.append((start, end))
+            start = end
+    ranges.append((start, size))
+    return ranges
+
+
+def _attach(shm_name: str) -> SharedMemory:
+    try:
+        return SharedMemory(name=shm_name, track=False)
+    except TypeError:
+        pass
+    # Before Python 3.13 attaching registers the block with the resource tracker, which may unlink it
+    # when the worker exits although the parent owns it. Workers run one task at a time, so patching is safe here.
+    register = resource_tracker.register
+    resource_tracker.register = lambda name, rtype: None
+    try:
+        return SharedMemory(name=shm_name)
+    finally:
+        resource_tracker.register = register
+
+
+def _run_chunk(shm_name: str, start: int, end: int, func: Callable, named_args: Mapping) -> str:
+    shm = _attach(shm_name)
+    try:
+        # Decoding (or copying, for byte symbols) straight from the shared buffer is the only copy in the worker
+        if getattr(func, 'accepts', TEXT) == TEXT:
+            data = codecs.utf_8_decode(shm.buf[start:end], 'strict', True)[0]
+        else:
+            data = bytes(shm.buf[start:end])
+    finally:
+        shm.close()
+    return str(to_text(materialize(call_symbol(func, data, named_args))))
+
+
+def run_chunk_parallel(func: Callable, stream: Stream, named_args: Mapping, executor: Executor,
+                       parts: Optional[int] = None) -> Stream:
+    """
+    Run a protocol.chunk_parallel symbol on pieces of stream in worker processes.
+    The UTF-8 input is placed in shared memory once, workers only receive its name and their byte range.
+    """
+    stream = materialize(stream)
+    if isinstance(stream, MappedText):
+        size = stream.nbytes
+        pieces = stream.iter_bytes(1 << 22)
+    elif isinstance(stream, BINARY_TYPES):
+        size = memoryview(stream).nbytes
+        pieces = (stream,)
+    else:
+        data = stream.encode('utf-8')
+        size = len(data)
+        pieces = (data,)
+    if size < MIN_PARALLEL_BYTES:
+        return materialize(call_symbol(func, stream, named_args))
+
+    separator, merge, prepare = func.chunk_parallel
+    shm = SharedMemory(create=True, size=size)
+    try:
+        offset = 0
+        for piece in pieces:
+            shm.buf[offset:offset + len(piece)] = piece
+            offset += len(piece)
+        del pieces, stream
+
+        if prepare is not None:
+            # Incomplete trailing characters of the prefix are left out
+            named_args = prepare(codecs.utf_8_decode(shm.buf[:PREFIX_SIZE], 'strict', False)[0], named_args)
+        ranges = split_offsets(shm.buf[:size], parts or os.cpu_count() or 1, separator.encode('utf-8'))
+        futures = [executor.submit(_run_chunk, shm.name, start, end, func, dict(named_args)) for start, end in ranges]
+        results = [future.result() for future in futures]
+    finally:
+        shm.close()
+        shm.unlink()
+    return merge(results, named_args) if merge else ''.join(results)
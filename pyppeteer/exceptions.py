@@ -24,3 +24,7 @@ class GenerateSymbolNotFound(Exception):
 
 class GenerateSymbolMethodNotFound(Exception):
     pass
+
+
+class GenerateMemoryLimitExceeded(Exception):
+    pass
@@ -1,7 +1,115 @@
-from pyppeteer.parser import Parser, Node, MethodCallNode, StatementNode
+import logging
+from concurrent.futures import Executor
+from itertools import chain
+from types import MappingProxyType
+from typing import TYPE_CHECKING, Callable, Iterable, Iterator, Mapping, Optional
+from pyppeteer.parser import MODULE_NAMES, ConcreteNode, Parser, Node, MethodCallNode, StatementNode
 from pyppeteer.exceptions import GenerateInvalidSequence, GenerateSymbolAlreadyExists, GenerateSymbolNotFound, \
     GenerateSymbolMethodNotFound
+from pyppeteer.scheduler import DEFAULT_STREAM, run_dataflow
 from pyppeteer.symbols import symbols
+from pyppeteer.symbols.protocol import Stream, call_symbol, decode_chunks, is_chunk_parallel, iter_chunks, \
+    layer_of, materialize, to_text
+
+if TYPE_CHECKING:
+    from pyppeteer.instrumentation import Instrumentation
+    from pyppeteer.memory_governor import MemoryGovernor
+    from pyppeteer.result_cache import ResultCache
+
+logger = logging.getLogger(__name__)
+
+
+class ExecutionContext:
+    """
+    Optional services used while executing statements, without any of them symbols are called directly
+    """
+    __slots__ = ('instrumentation', 'result_cache', 'chunk_executor', 'chunk_parts', 'memory')
+
+    def __init__(self, instrumentation: Optional['Instrumentation'] = None,
+                 result_cache: Optional['ResultCache'] = None, chunk_executor: Optional[Executor] = None,
+                 chunk_parts: Optional[int] = None, memory: Optional['MemoryGovernor'] = None):
+        self.instrumentation = instrumentation
+        self.result_cache = result_cache
+        # Process pool for symbols declared protocol.chunk_parallel
+        self.chunk_executor = chunk_executor
+        self.chunk_parts = chunk_parts
+        # Memory budget of the intermediate streams, chunked pipelines stay lazy under it
+        self.memory = memory
+
+    @property
+    def plain(self) -> bool:
+        return self.instrumentation is None and self.result_cache is None and self.chunk_executor is None
+
+    def materialize(self, stream: Stream) -> Stream:
+        # Streams too large for the memory budget are spilled to disk instead of being joined in memory
+        return self.memory.spool(stream) if self.memory is not None else materialize(stream)
+
+    def other_streams(self, streams: dict, into: Optional[str], sources: tuple) -> int:
+        """
+        Resident bytes of the named streams alive next to the input and output of a statement
+        """
+        if self.memory is None:
+            return 0
+        skip = set(sources or (DEFAULT_STREAM,)) | {into or DEFAULT_STREAM}
+        return self.memory.resident(stream for name, stream in streams.items() if name not in skip)
+
+    def call(self, func: Callable, stream: Stream, named_args: Mapping) -> Stream:
+        if self.chunk_executor is not None and is_chunk_parallel(func):
+            # Imported here, multiprocessing is only needed once a process pool is in use
+            from pyppeteer.data_parallel import run_chunk_parallel
+            return run_chunk_parallel(func, stream, named_args, self.chunk_executor, self.chunk_parts)
+        return self.materialize(call_symbol(func, stream, named_args))
+
+
+def run_step(context: ExecutionContext, index: int, label: str, func: Callable, stream: Stream,
+             named_args: Mapping, others: int = 0) -> Stream:
+    """
+    :param others: Resident bytes of the other named streams, see ExecutionContext.other_streams
+    """
+    memory = context.memory
+    if memory is None:
+        return _execute(context, index, label, func, stream, named_args)
+    stream = memory.admit(index, label, func, stream, others)
+    return memory.settle(index, label, stream, _execute(context, index, label, func, stream, named_args), others)
+
+
+def _execute(context: ExecutionContext, index: int, label: str, func: Callable, stream: Stream,
+             named_args: Mapping) -> Stream:
+    if context.plain:
+        return call_symbol(func, stream, named_args)
+
+    # Materialize around the call so lazily chained work is attributed to the statement doing it
+    # and both input and output can be hashed / cached
+    stream = context.materialize(stream)
+    instrumentation, result_cache = context.instrumentation, context.result_cache
+    if instrumentation:
+        instrumentation.on_statement_start(index, label, named_args, stream)
+
+    key = result_cache.key(label, func, named_args, stream) if result_cache else None
+    out_stream = result_cache.get(key) if key else None
+    if out_stream is None:
+        out_stream = context.call(func, stream, named_args)
+        if key:
+            result_cache.put(key, out_stream)
+
+    if instrumentation:
+        instrumentation.on_statement_end(index, label, out_stream)
+    return out_stream
+
+
+def read_streams(streams: dict, sources: tuple, spool: Callable[[Stream], Stream] = materialize) -> Stream:
+    """
+    Input of a statement with bindings. Named streams may be read several times, so they are materialized in place
+    :param spool: Materializes one stream, e.g., ExecutionContext.materialize
+    """
+    values = []
+    for name in sources or (DEFAULT_STREAM,):
+        stream = streams[name] = spool(streams.get(name, ''))
+        values.append(stream)
+    if len(values) == 1:
+        return values[0]
+    # Joined chunk by chunk, so the concatenation stays within the memory budget like any other stream
+    return spool(chain.from_iterable(decode_chunks(iter_chunks(value)) for value in values))
 
 
 class NodeVisitor:
@@ -14,25 +122,149 @@ class NodeVisitor:
         raise Exception('No visit_{} method'.format(type(node).__name__))
 
 
+class ExecutionPlan:
+    """
+    Compiled script: symbols are resolved and named arguments frozen once, so the plan can be run for many inputs
+    """
+
+    def __init__(self, steps: Iterable[tuple[str, Callable, Mapping, Optional[str], tuple]],
+                 context: Optional[ExecutionContext] = None):
+        self._steps = tuple(steps)
+        self.context = context or ExecutionContext()
+        # Plans without named streams are a single linear chain
+        self._linear = not any(into or sources for _, _, _, into, sources in self._steps)
+
+    def __len__(self):
+        return len(self._steps)
+
+    def run(self, input_stream: Stream = '') -> Stream:
+        """
+        Execute all steps, the result may be a lazy stream of chunks (see protocol.materialize)
+        """
+        if not self._linear:
+            streams = {DEFAULT_STREAM: input_stream}
+            context = self.context
+            for index, (label, func, named_args, into, sources) in enumerate(self._steps):
+                stream = read_streams(streams, sources, context.materialize)
+                streams[into or DEFAULT_STREAM] = run_step(context, index, label, func, stream, named_args,
+                                                           context.other_streams(streams, into, sources))
+            return streams[DEFAULT_STREAM]
+
+        if self.context.plain and self.context.memory is None:
+            for _, func, named_args, _, _ in self._steps:
+                input_stream = call_symbol(func, input_stream, named_args)
+            return input_stream
+
+        for index, (label, func, named_args, _, _) in enumerate(self._steps):
+            input_stream = run_step(self.context, index, label, func, input_stream, named_args)
+        return input_stream
+
+    def run_parallel(self, input_stream: Stream = '', executor: Optional[Executor] = None) -> Stream:
+        """
+        Execute the dependency graph of the named streams, independent branches run concurrently on executor.
+        Instrumentation, result cache and memory budget are not used.
+        """
+        return run_dataflow(self._steps, input_stream, executor)
+
+
 class FilterLayerGenerator(NodeVisitor):
-    def __init__(self):
+    def __init__(self, instrumentation: Optional['Instrumentation'] = None,
+                 result_cache: Optional['ResultCache'] = None, chunk_executor: Optional[Executor] = None,
+                 chunk_parts: Optional[int] = None, memory: Optional['MemoryGovernor'] = None):
         self.symbols = symbols.SYMBOLS
+        self.context = ExecutionContext(instrumentation, result_cache, chunk_executor, chunk_parts, memory)
         self._cur_node_id = 0
         self._in_stream = ''
+        # Named streams bound with into=, the default stream is _in_stream
+        self._streams = {}
+        # Video layers added by symbols declared protocol.layer, in script order
+        self.layers: [ConcreteNode] = []
         self.parser = Parser()
 
-    def render(self, dimensions: [tuple[int, int]]):
+    def render(self, dimensions: [tuple[int, int]], path: Optional[str] = None, fps: Optional[int] = None) -> int:
         """
-        For each root_node_n node, create a VideoClip and combine them using concatenate clip
-        :return:
+        Composite the collected layers frame by frame and stream them to a Y4M (.y4m) or raw RGB file
+        :return: Number of frames written
         """
-        pass
+        if not self.layers or not path:
+            return 0
+        # NumPy is only imported once there is something to render
+        from pyppeteer.render import DEFAULT_FPS, Renderer
+        width, height = (int(d) for d in dimensions)
+        return Renderer(width, height, fps or DEFAULT_FPS).render(self.layers, path)
 
     def generate(self, root: Node):
         return self.visit(root)
 
+    @property
+    def output(self) -> str:
+        """
+        Final text of all statements generated so far
+        """
+        self._in_stream = self.context.materialize(self._in_stream)
+        return str(to_text(self._in_stream))
+
+    def snapshot(self) -> tuple:
+        """
+        State after the statements generated so far, see restore. Streams are materialized to be reusable.
+        """
+        self._in_stream = self.context.materialize(self._in_stream)
+        for name, stream in self._streams.items():
+            self._streams[name] = self.context.materialize(stream)
+        return self._cur_node_id, self._in_stream, dict(self._streams), tuple(self.layers)
+
+    def restore(self, snapshot: tuple):
+        """
+        Continue generating from a state returned by snapshot
+        """
+        self._cur_node_id, self._in_stream, streams, layers = snapshot
+        self._streams = dict(streams)
+        self.layers = list(layers)
+
+    def iter_output(self) -> Iterator[str]:
+        """
+        Final text as chunks, runs chunked pipelines in constant memory but consumes them
+        """
+        return iter_chunks(self._in_stream)
+
+    def compile(self, statements: Iterable[StatementNode]) -> ExecutionPlan:
+        """
+        Resolve and validate every statement up front, symbol errors are raised here instead of mid-run
+        :param statements: Parsed statements, e.g., from Parser.parse or Parser.iter_parse
+        :return: ExecutionPlan
+        """
+        steps = []
+        for statement in statements:
+            if type(statement.node) != MethodCallNode:
+                raise GenerateInvalidSequence('Invalid node {n}'.format(n=statement.node))
+            step = self._resolve(statement.node)
+            if step:
+                steps.append((self._label(statement.node), *step, statement.node.into, statement.node.sources))
+        return ExecutionPlan(steps, self.context)
+
+    @staticmethod
+    def _label(node: MethodCallNode) -> str:
+        return '{m}.{f}'.format(m=MODULE_NAMES.get(node.module, node.module), f=node.method)
+
+    def _resolve(self, node: MethodCallNode) -> Optional[tuple[Callable, Mapping]]:
+        module_name = node.module
+        references_id = node.method
+        args = node.named_args
+
+        if not references_id:
+            return None
+
+        # The symbol module is imported on its first lookup
+        module_dict = self.symbols.get(module_name, None)
+        if not module_dict:
+            raise GenerateSymbolNotFound('Module ' + module_name + ' not found!')
+        func = module_dict.get(references_id)
+        if func is None:
+            raise GenerateSymbolMethodNotFound('Module ' + module_name + ' has no method ' + references_id)
+        return func, MappingProxyType(dict(args))
+
     def visit_StatementNode(self, node: StatementNode, parent: Node = None):
-        print("visit statement node", node)
+        logger.debug('visit statement node %s', self._cur_node_id)
         if type(node.node) == MethodCallNode:
             self.visit_MethodCallNode(node.node, node)
         else:
@@ -42,24 +274,27 @@ class FilterLayerGenerator(NodeVisitor):
         return
 
     def visit_MethodCallNode(self, node: MethodCallNode, parent: StatementNode = None):
-        print('visit method call node', node)
-
-        module_name = node.args.get('module', None)
-        references_id = node.args.get('method', None)
-        args = node.args.get('args', [])
-
-        in_stream = self._in_stream
-
-        if references_id:
-            module_dict = self.symbols.get(module_name, None)
-            if module_dict:
-                try:
-                    reference_obj = next(x for x in module_dict if x[0] == references_id)
-                    # Call method name by reference_id
-                    self._in_stream = reference_obj[1](in_stream, dict(args))
-                except StopIteration:
-                    raise GenerateSymbolMethodNotFound('Module ' + module_name + ' has no method ' + references_id)
+        step = self._resolve(node)
+        if step:
+            # Call method name by reference_id
+            func, named_args = step
+            label = self._label(node)
+            logger.debug('call %s with %s', label, dict(named_args))
+            if node.into or node.sources:
+                self._streams[DEFAULT_STREAM] = self._in_stream
+                stream = read_streams(self._streams, node.sources, self.context.materialize)
+                out_stream = run_step(self.context, self._cur_node_id, label, func, stream, named_args,
+                                      self.context.other_streams(self._streams, node.into, node.sources))
+                self._streams[node.into or DEFAULT_STREAM] = out_stream
+                self._in_stream = self._streams.pop(DEFAULT_STREAM)
             else:
-                raise GenerateSymbolNotFound('Module ' + module_name + ' not found!')
+                # Chunked symbols are chained lazily, nothing is read until the output is consumed
+                self._in_stream = run_step(self.context, self._cur_node_id, label, func, self._in_stream,
+                                           named_args)
+                out_stream = self._in_stream
+
+            make_layer = layer_of(func)
+            if make_layer is not None:
+                self.layers.append(make_layer(out_stream, named_args))
 
         return
@@ -0,0 +1,94 @@
+import json
+import os
+import threading
+import time
+import tracemalloc
+from typing import Mapping, Optional
+
+from pyppeteer.memory_governor import stream_bytes
+from pyppeteer.symbols.protocol import WHOLE_TYPES, Stream
+
+
+def stream_size(stream: Stream) -> Optional[int]:
+    # Bytes for text and binary streams alike, a MappedText reports its mapped size without indexing characters
+    if not isinstance(stream, WHOLE_TYPES):
+        # Lazy chunk iterator
+        return None
+    return stream_bytes(stream)
+
+
+class Instrumentation:
+    """
+    Base class for FilterLayerGenerator hooks, a generator without instrumentation skips all hook calls.
+    While instrumented, the generator materializes the output of every statement so its cost is attributed to it.
+    """
+
+    def on_statement_start(self, index: int, label: str, named_args: Mapping, in_stream: Stream) -> None:
+        pass
+
+    def on_statement_end(self, index: int, label: str, out_stream: Stream) -> None:
+        pass
+
+
+class Profiler(Instrumentation):
+    """
+    Records wall time, CPU time, input/output sizes and (with trace_memory) allocation deltas per statement
+    """
+
+    def __init__(self, trace_memory: bool = False):
+        self.trace_memory = trace_memory
+        self.records = []
+        self._origin = time.perf_counter()
+        self._pending = None
+        if trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def on_statement_start(self, index: int, label: str, named_args: Mapping, in_stream: Stream) -> None:
+        allocated = 0
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+            allocated = tracemalloc.get_traced_memory()[0]
+        self._pending = {'index': index, 'label': label, 'args': dict(named_args), 'in_size': stream_size(in_stream),
+                         'allocated': allocated, 'wall': time.perf_counter(), 'cpu': time.process_time()}
+
+    def on_statement_end(self, index: int, label: str, out_stream: Stream) -> None:
+        wall, cpu = time.perf_counter(), time.process_time()
+        record = self._pending
+        self._pending = None
+        record['start'] = record['wall'] - self._origin
+        record['wall'] = wall - record['wall']
+        record['cpu'] = cpu - record['cpu']
+        record['out_size'] = stream_size(out_stream)
+        if self.trace_memory:
+            current, peak = tracemalloc.get_traced_memory()
+            record['alloc_delta'] = current - record['allocated']
+            record['alloc_peak'] = peak - record['allocated']
+        del record['allocated']
+        self.records.append(record)
+
+    def chrome_trace(self) -> dict:
+        """
+        Records in Chrome trace-event format (load in chrome://tracing or Perfetto)
+        """
+        pid, tid = os.getpid(), threading.get_ident()
+        events = [{'name': r['label'], 'cat': 'statement', 'ph': 'X', 'pid': pid, 'tid': tid,
+                   'ts': r['start'] * 1e6, 'dur': r['wall'] * 1e6,
+                   'args': {k: v for k, v in r.items() if k not in ('label', 'start', 'wall')}}
+                  for r in self.records]
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def write_trace(self, path: str) -> None:
+        with open(path, 'w') as file:
+            json.dump(self.chrome_trace(), file)
+
+    def summary(self, top: int = 10) -> str:
+        """
+        Table of the statements with the highest wall time
+        """
+        lines = ['{i:>5}  {l:<20} {w:>10} {c:>10} {n:>12} {o:>12} {a:>12}'.format(
+            i='#', l='statement', w='wall ms', c='cpu ms', n='in bytes', o='out bytes', a='alloc delta')]
+        for r in sorted(self.records, key=lambda e: e['wall'], reverse=True)[:top]:
+            lines.append('{i:>5}  {l:<20} {w:>10.3f} {c:>10.3f} {n:>12} {o:>12} {a:>12}'.format(
+                i=r['index'], l=r['label'], w=r['wall'] * 1e3, c=r['cpu'] * 1e3, n=str(r['in_size']),
+                o=str(r['out_size']), a=str(r.get('alloc_delta', '-'))))
+        return '\n'.join(lines)
@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+import bisect
+import codecs
+import mmap
+from typing import Iterator, Optional, Union
+
+# Size of one block of the sparse character offset index
+BLOCK_SIZE = 1 << 16
+
+# Every byte that is not a UTF-8 continuation byte (0b10xxxxxx) starts a character
+_LEAD_BYTES = bytes(range(0x80)) + bytes(range(0xc0, 0x100))
+
+
+class _MappedFile:
+    """
+    Read-only memory map of an UTF-8 file with a lazily built character -> byte offset index
+    """
+
+    def __init__(self, path: str):
+        with open(path, 'rb') as file:
+            try:
+                self.data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                # Empty files cannot be mapped
+                self.data = b''
+        self.size = len(self.data)
+        # Block boundaries, always aligned to the start of a character
+        self._bytes = [0]
+        self._chars = [0]
+
+    @property
+    def indexed(self) -> bool:
+        return self._bytes[-1] == self.size
+
+    def char_length(self) -> int:
+        self._extend(None)
+        return self._chars[-1]
+
+    def byte_offset(self, char: int) -> int:
+        self._extend(char)
+        if char >= self._chars[-1]:
+            return self._bytes[-1]
+
+        i = bisect.bisect_right(self._chars, char) - 1
+        b0, b1 = self._bytes[i], self._bytes[i + 1]
+        c0, c1 = self._chars[i], self._chars[i + 1]
+        if b1 - b0 == c1 - c0:
+            # Pure ASCII block
+            return b0 + (char - c0)
+        return b0 + len(self.data[b0:b1].decode('utf-8')[:char - c0].encode('utf-8'))
+
+    def decode(self, b0: int, b1: int) -> str:
+        return self.data[b0:b1].decode('utf-8')
+
+    def _extend(self, char: Optional[int]) -> None:
+        while not self.indexed and (char is None or self._chars[-1] <= char):
+            start = self._bytes[-1]
+            end = min(start + BLOCK_SIZE, self.size)
+            while end < self.size and self.data[end] & 0xc0 == 0x80:
+                end -= 1
+            block = self.data[start:end]
+            self._bytes.append(end)
+            self._chars.append(self._chars[-1] + len(block) - len(block.translate(None, _LEAD_BYTES)))
+
+
+class MappedText:
+    """
+    Lazy text source backed by a memory-mapped file.
+    Slicing returns another view without copying, the text is only decoded when converted with str().
+    Offsets are in characters, line endings are not translated (unlike files opened in text mode).
+    """
+
+    def __init__(self, mapped: _MappedFile, start: int = 0, stop: Optional[int] = None):
+        self._mapped = mapped
+        self._start = start
+        self._stop = stop
+
+    @classmethod
+    def open(cls, path: str) -> MappedText:
+        return cls(_MappedFile(path))
+
+    def _byte_range(self) -> tuple[int, int]:
+        b0 = self._mapped.byte_offset(self._start)
+        b1 = self._mapped.size if self._stop is None else self._mapped.byte_offset(self._stop)
+        return b0, max(b0, b1)
+
+    @property
+    def nbytes(self) -> int:
+        b0, b1 = self._byte_range()
+        return b1 - b0
+
+    def __len__(self):
+        stop = self._mapped.char_length() if self._stop is None else min(self._stop, self._mapped.char_length())
+        return max(0, stop - self._start)
+
+    def __bool__(self):
+        b0, b1 = self._byte_range()
+        return b1 > b0
+
+    def __getitem__(self, key: Union[int, slice]) -> Union[str, MappedText]:
+        if isinstance(key, int):
+            if key < 0:
+                key += len(self)
+            if key < 0 or (self._stop is not None and self._start + key >= self._stop):
+                raise IndexError('MappedText index out of range')
+            char = str(MappedText(self._mapped, self._start + key, self._start + key + 1))
+            if not char:
+                raise IndexError('MappedText index out of range')
+            return char
+
+        if key.step not in (None, 1):
+            return str(self)[key]
+
+        if (key.start or 0) < 0 or (key.stop or 0) < 0:
+            start, stop, _ = key.indices(len(self))
+        else:
+            start, stop = key.start or 0, key.stop
+
+        new_start = self._start + start
+        new_stop = self._stop if stop is None else self._start + stop
+        if self._stop is not None and new_stop is not None:
+            new_stop = min(new_stop, self._stop)
+        return MappedText(self._mapped, new_start, new_stop)
+
+    def __str__(self):
+        return self._mapped.decode(*self._byte_range())
+
+    def raw(self) -> memoryview:
+        """
+        Raw UTF-8 bytes of the view without copying
+        """
+        b0, b1 = self._byte_range()
+        return memoryview(self._mapped.data)[b0:b1]
+
+    def iter_bytes(self, chunk_size: int = BLOCK_SIZE) -> Iterator[memoryview]:
+        """
+        Raw UTF-8 bytes of the view without copying, chunk_size is given in bytes
+        """
+        b0, b1 = self._byte_range()
+        data = memoryview(self._mapped.data)
+        for offset in range(b0, b1, chunk_size):
+            yield data[offset:min(offset + chunk_size, b1)]
+
+    def iter_chunks(self, chunk_size: int = BLOCK_SIZE) -> Iterator[str]:
+        """
+        Decode the view incrementally, chunk_size is given in bytes
+        """
+        b0, b1 = self._byte_range()
+        decoder = codecs.getincrementaldecoder('utf-8')()
+        for offset in range(b0, b1, chunk_size):
+            chunk = decoder.decode(self._mapped.data[offset:min(offset + chunk_size, b1)])
+            if chunk:
+                yield chunk
+
+    def __repr__(self):
+        return 'MappedText [{s}:{e}]'.format(s=self._start, e='' if self._stop is None else self._stop)
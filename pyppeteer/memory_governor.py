@@ -0,0 +1,183 @@
+import mmap
+import os
+import sys
+import tempfile
+from typing import Callable, Iterable, Optional, Union
+
+from pyppeteer.exceptions import GenerateMemoryLimitExceeded
+from pyppeteer.mapped_text import MappedText
+from pyppeteer.symbols.protocol import BINARY_TYPES, WHOLE_TYPES, Binary, Stream, is_chunked, is_mappable, \
+    iter_chunks, materialize
+
+_SUFFIX = '.spill'
+
+
+def resident_size(stream: Stream) -> int:
+    """
+    Bytes of a stream held in memory. Memory-mapped streams live in the page cache and lazy chunk iterators
+    hold a chunk at a time, both count as 0.
+    """
+    if not isinstance(stream, WHOLE_TYPES) or isinstance(stream, MappedText) or not stream:
+        return 0
+    if isinstance(stream, memoryview):
+        return 0 if isinstance(stream.obj, mmap.mmap) else stream.nbytes
+    return sys.getsizeof(stream)
+
+
+def stream_bytes(stream: Stream) -> int:
+    """
+    Size of a whole stream wherever it is stored, i.e., the memory a symbol reading all of it at once needs
+    """
+    if isinstance(stream, MappedText):
+        return stream.nbytes
+    if isinstance(stream, BINARY_TYPES):
+        return memoryview(stream).nbytes
+    if isinstance(stream, str):
+        return sys.getsizeof(stream)
+    return 0
+
+
+def _mib(size: int) -> str:
+    return '{m:.1f} MiB'.format(m=size / (1024 * 1024))
+
+
+class MemoryGovernor:
+    """
+    Keeps the intermediate streams of a pipeline within max_bytes of memory. Streams exceeding the budget are
+    spilled to temporary files and read back memory-mapped, symbols that would need more than the budget in memory
+    fail before they run. The peak resident size of every statement is recorded.
+    """
+
+    def __init__(self, max_bytes: int, directory: Optional[str] = None):
+        self.max_bytes = max_bytes
+        self.directory = directory
+        self.records = []
+        self.spilled_bytes = 0
+        # Most bytes held by spool() since the last statement, before it joined or spilled them
+        self._spooled = 0
+        # Spill files that could not be removed while mapped (Windows)
+        self._paths: [str] = []
+
+    def spool(self, stream: Stream, limit: Optional[int] = None) -> Union[str, MappedText, Binary]:
+        """
+        materialize() within the budget: chunks are joined in memory up to limit bytes (default: max_bytes),
+        a larger stream is written to a temporary file instead
+        """
+        if isinstance(stream, WHOLE_TYPES):
+            return stream
+        limit = self.max_bytes if limit is None else limit
+        pending = []
+        size = 0
+        chunks = iter(stream)
+        for chunk in chunks:
+            pending.append(chunk)
+            size += stream_bytes(chunk)
+            if size > limit:
+                self._spooled = max(self._spooled, size)
+                return self.spill(pending, chunks)
+        # Joining holds the chunks and their concatenation
+        self._spooled = max(self._spooled, 2 * size)
+        return materialize(pending)
+
+    def spill(self, *parts: Iterable[Union[str, Binary]]) -> Union[MappedText, memoryview]:
+        """
+        Write chunks to a temporary file and map it, text is returned as MappedText, binary data as a memoryview
+        """
+        fd, path = tempfile.mkstemp(suffix=_SUFFIX, dir=self.directory)
+        binary = None
+        with os.fdopen(fd, 'wb') as file:
+            for chunks in parts:
+                for chunk in chunks:
+                    if binary is None:
+                        binary = not isinstance(chunk, str)
+                    file.write(chunk.encode('utf-8') if isinstance(chunk, str) else chunk)
+                if isinstance(chunks, list):
+                    # Joined chunks are released as soon as they are written
+                    chunks.clear()
+            self.spilled_bytes += file.tell()
+        mapped = MappedText.open(path)
+        try:
+            # The mapping keeps the data, the file disappears with its last view
+            os.remove(path)
+        except OSError:
+            self._paths.append(path)
+        return mapped.raw() if binary else mapped
+
+    def admit(self, index: int, label: str, func: Callable, stream: Stream, others: int = 0) -> Stream:
+        """
+        Input of a statement. Chunked symbols stream it; symbols reading their whole input get it materialized
+        within the budget and fail before they run if they could not hold it in memory.
+        :param others: Resident bytes of the other streams alive during the statement
+        """
+        if is_chunked(func):
+            return stream
+        limit = self.max_bytes - others
+        if is_mappable(func):
+            return self.spool(stream, limit)
+
+        # Spilling cannot help a symbol loading its input, it fails as soon as the input is known to be too large
+        if not isinstance(stream, WHOLE_TYPES):
+            pending = []
+            size = 0
+            for chunk in stream:
+                pending.append(chunk)
+                size += stream_bytes(chunk)
+                if size > limit:
+                    raise self._too_large(index, label, 'more than ' + _mib(size), others)
+            self._spooled = max(self._spooled, 2 * size)
+            stream = materialize(pending)
+        needed = stream_bytes(stream)
+        if needed > limit:
+            raise self._too_large(index, label, _mib(needed), others)
+        return stream
+
+    def _too_large(self, index: int, label: str, size: str, others: int) -> GenerateMemoryLimitExceeded:
+        return GenerateMemoryLimitExceeded(
+            'Statement {i} ({l}) reads its whole input of {n} into memory, {o} are held by other streams, '
+            'the memory budget is {m}. Use streaming symbols, select a smaller range first '
+            'or raise --max-memory'.format(i=index, l=label, n=size, o=_mib(others), m=_mib(self.max_bytes)))
+
+    def settle(self, index: int, label: str, in_stream: Stream, out_stream: Stream, others: int = 0) -> Stream:
+        """
+        Output of a statement, spilled if it does not fit into the budget next to the other streams
+        """
+        in_size, out_size = resident_size(in_stream), resident_size(out_stream)
+        # Input and output are both alive when the symbol returns, chunks being joined before
+        peak = others + max(in_size + out_size, self._spooled)
+        self._spooled = 0
+        spilled = 0
+        if others + out_size > self.max_bytes:
+            out_stream = self.spill(iter_chunks(out_stream))
+            spilled = out_size
+        self.records.append({'index': index, 'label': label, 'peak': peak, 'resident': others + out_size - spilled,
+                             'spilled': spilled})
+        return out_stream
+
+    @staticmethod
+    def resident(streams: Iterable[Stream]) -> int:
+        return sum(resident_size(stream) for stream in streams)
+
+    @property
+    def peak(self) -> int:
+        return max((r['peak'] for r in self.records), default=0)
+
+    def summary(self) -> str:
+        """
+        Table of the peak and remaining resident intermediate size of every statement
+        """
+        lines = ['{i:>5}  {l:<20} {p:>14} {r:>14} {s:>14}'.format(
+            i='#', l='statement', p='peak bytes', r='resident', s='spilled')]
+        for r in self.records:
+            lines.append('{i:>5}  {l:<20} {p:>14,} {r:>14,} {s:>14,}'.format(
+                i=r['index'], l=r['label'], p=r['peak'], r=r['resident'], s=r['spilled']))
+        lines.append('budget {m}, peak {p}, {s} spilled to disk'.format(
+            m=_mib(self.max_bytes), p=_mib(self.peak), s=_mib(self.spilled_bytes)))
+        return '\n'.join(lines)
+
+    def close(self):
+        for path in self._paths:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        self._paths = []
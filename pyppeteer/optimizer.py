@@ -0,0 +1,107 @@
+from typing import Mapping, Optional
+
+from pyppeteer.parser import MethodCallNode, StatementNode
+from pyppeteer.symbols import symbols
+from pyppeteer.symbols.protocol import slice_range
+
+
+class Optimizer:
+    """
+    Rewrites a statement list before execution, driven by the OPTIMIZER metadata declared next to the SYMBOLS lists:
+    pure: no side effects, the statement may be removed if its output is unused
+    source: callable(named_args) -> True if the output does not depend on the input stream
+    slice: keeps the characters [from:to] of its input
+    accepts_range: takes from/to arguments to only produce that character range (target of slice push-down)
+    """
+
+    def __init__(self, metadata: Mapping = None):
+        self.metadata = symbols.OPTIMIZER if metadata is None else metadata
+        self.notes: [str] = []
+        self._input_count = 0
+
+    def optimize(self, statements: [StatementNode]) -> [StatementNode]:
+        statements = list(statements)
+        self._input_count = len(statements)
+        self.notes = []
+        if any(type(s.node) != MethodCallNode or s.node.into or s.node.sources for s in statements):
+            # Scripts with named streams are not a single chain and are left as they are
+            return statements
+
+        nodes = [s.node for s in statements]
+        nodes = self._eliminate_dead_sources(nodes)
+        nodes = self._fuse_slices(nodes)
+        return [StatementNode(n) for n in nodes]
+
+    def explain(self, statements: [StatementNode]) -> str:
+        lines = ['Optimized plan ({i} -> {o} statements):'.format(i=self._input_count, o=len(statements))]
+        lines += ['  {n:>4}  {s}'.format(n=n, s=s.node) for n, s in enumerate(statements)]
+        if self.notes:
+            lines.append('Rewrites:')
+            lines += ['  - ' + note for note in self.notes]
+        return '\n'.join(lines)
+
+    def _meta(self, node: MethodCallNode) -> Mapping:
+        return self.metadata.get(node.module, {}).get(node.method, {})
+
+    def _range(self, node: MethodCallNode) -> Optional[tuple[int, Optional[int]]]:
+        try:
+            # Bounds are read the way Stream.select reads them
+            start, stop = slice_range(dict(node.named_args))
+        except ValueError:
+            return None
+        if start < 0 or (stop is not None and stop < 0):
+            return None
+        return start, stop
+
+    @staticmethod
+    def _with_range(node: MethodCallNode, start: int, stop: Optional[int]) -> MethodCallNode:
+        named_args = [(k, v) for k, v in node.named_args if k not in ('from', 'to')]
+        if start:
+            named_args.append(('from', str(start)))
+        if stop is not None:
+            named_args.append(('to', str(stop)))
+        return MethodCallNode(node.module, node.method, tuple(named_args))
+
+    def _eliminate_dead_sources(self, nodes: [MethodCallNode]) -> [MethodCallNode]:
+        # Everything before a source is dead as long as it has no side effects
+        start = 0
+        removable = True
+        for i, node in enumerate(nodes):
+            meta = self._meta(node)
+            source = meta.get('source')
+            if i > start and removable and source and source(dict(node.named_args)):
+                for dead in nodes[start:i]:
+                    self.notes.append('removed {d}, its output is replaced by {n}'.format(d=dead, n=node))
+                start = i
+                removable = True
+            removable = removable and meta.get('pure', False)
+        return nodes[start:]
+
+    def _fuse_slices(self, nodes: [MethodCallNode]) -> [MethodCallNode]:
+        fused = []
+        for node in nodes:
+            node_range = self._range(node) if self._meta(node).get('slice') else None
+            if node_range is None:
+                fused.append(node)
+                continue
+
+            start, stop = node_range
+            if start == 0 and stop is None:
+                self.notes.append('removed no-op {n}'.format(n=node))
+                continue
+
+            prev = fused[-1] if fused else None
+            prev_meta = self._meta(prev) if prev else {}
+            prev_range = self._range(prev) if prev_meta.get('slice') or prev_meta.get('accepts_range') else None
+            if prev_range is None:
+                fused.append(node)
+                continue
+
+            # [a:b][c:d] == [a + c:min(b, a + d)]
+            prev_start, prev_stop = prev_range
+            new_stop = [s for s in (prev_stop, None if stop is None else prev_start + stop) if s is not None]
+            rewritten = self._with_range(prev, prev_start + start, min(new_stop) if new_stop else None)
+            self.notes.append('{v} {n} into {p} -> {r}'.format(
+                v='fused' if prev_meta.get('slice') else 'pushed', n=node, p=prev, r=rewritten))
+            fused[-1] = rewritten
+        return fused
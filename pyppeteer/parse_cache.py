@@ -0,0 +1,97 @@
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+from typing import Optional
+
+# Default upper bound for all cached ASTs in one cache directory
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+_SUFFIX = '.ast'
+_STATS_FILE = 'stats.json'
+
+
+def evict_lru(directory: str, suffix: str, max_bytes: int) -> None:
+    """
+    Remove the least recently used files ending in suffix until the directory holds at most max_bytes of them
+    """
+    entries = []
+    for entry in os.scandir(directory):
+        if entry.name.endswith(suffix):
+            stat = entry.stat()
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+    total = sum(e[1] for e in entries)
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        total -= size
+
+
+class ParseCache:
+    """
+    Persistent cache of parsed statement lists, keyed by the script content hash and the parser version.
+    Entries are evicted least recently used first once the directory exceeds max_bytes.
+    """
+
+    def __init__(self, directory: str, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def key(script: bytes, version: str) -> str:
+        return hashlib.sha256(version.encode() + b'\0' + script).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key + _SUFFIX)
+
+    def get(self, key: str) -> Optional[list]:
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as file:
+                statements = pickle.load(file)
+        except (OSError, pickle.PickleError, EOFError):
+            self.misses += 1
+            return None
+        # Refresh the access time used for LRU eviction
+        os.utime(path)
+        self.hits += 1
+        return statements
+
+    def put(self, key: str, statements: list) -> None:
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory)
+        with os.fdopen(fd, 'wb') as file:
+            pickle.dump(statements, file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, self._path(key))
+        evict_lru(self.directory, _SUFFIX, self.max_bytes)
+
+    def stats(self) -> dict:
+        """
+        Counters of this instance plus the totals persisted by flush_stats
+        """
+        try:
+            with open(os.path.join(self.directory, _STATS_FILE), 'r') as file:
+                totals = json.load(file)
+        except (OSError, ValueError):
+            totals = {'hits': 0, 'misses': 0}
+        return {'hits': self.hits, 'misses': self.misses,
+                'total_hits': totals['hits'] + self.hits, 'total_misses': totals['misses'] + self.misses}
+
+    def flush_stats(self) -> None:
+        """
+        Add this instance's counters to the totals stored in the cache directory and reset them
+        """
+        stats = self.stats()
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory)
+        with os.fdopen(fd, 'w') as file:
+            json.dump({'hits': stats['total_hits'], 'misses': stats['total_misses']}, file)
+        os.replace(tmp_path, os.path.join(self.directory, _STATS_FILE))
+        self.hits = 0
+        self.misses = 0
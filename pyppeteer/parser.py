@@ -1,9 +1,22 @@
 import os
 import abc
+from types import MappingProxyType
+from typing import TYPE_CHECKING, Iterable, Iterator, Mapping, Optional, TextIO, Union
 
-from pyppeteer.scanner import Scanner, TokenType
+from pyppeteer.scanner import KEYWORDS, Scanner, TokenType
 from pyppeteer.exceptions import ParseSyntaxException
 
+if TYPE_CHECKING:
+    # Only needed when a cache is passed in, which imports it anyway
+    from pyppeteer.parse_cache import ParseCache
+
+# Defaults of the video layers created by Std.show_text / Std.show_image
+DEFAULT_LAYER_SECONDS = 3.0
+DEFAULT_TEXT_SIZE = 48
+
+# Bump whenever the AST produced for the same script changes, invalidates all ParseCache entries
+PARSER_VERSION = '4'
+
 MODULE_TOKEN_TYPES = [TokenType.MODULE_NLP,
                       TokenType.MODULE_TAB,
                       TokenType.MODULE_STD,
@@ -22,72 +35,145 @@ MODULE_TOKEN_TYPES = [TokenType.MODULE_NLP,
                       TokenType.MODULE_STREAM]
 
 
+# MODULE_STREAM -> Stream
+MODULE_NAMES = {ttype.name: name for name, ttype in KEYWORDS.items()}
+
+# Reserved named arguments binding statements to named streams instead of the default stream
+BINDING_INTO = 'into'
+BINDING_FROM = 'from_stream'
+
+
 class Node(abc.ABC):
-    pass
+    __slots__ = ()
 
 
 class StatementNode(Node):
-    def __init__(self):
+    __slots__ = ('node',)
+
+    def __init__(self, node: Node = None):
         super().__init__()
-        self.node = None
+        self.node = node
 
 
 class MethodCallNode(Node):
-    def __init__(self):
+    __slots__ = ('module', 'method', 'named_args', 'into', 'sources')
+
+    def __init__(self, module: str = '', method: str = '', named_args: tuple = (), into: Optional[str] = None,
+                 sources: tuple = ()):
         super().__init__()
-        self.args = {
-            'method': '',
-            'args': []
-        }
+        self.module = module
+        self.method = method
+        # ((key, value), ...) in script order
+        self.named_args = named_args
+        # Named output stream and input streams, None / () is the default stream
+        self.into = into
+        self.sources = sources
+
+    @property
+    def args(self) -> Mapping:
+        """
+        Read-only snapshot in the former dict layout {'module', 'method', 'args': ((key, value), ...)}.
+        Writes to it raise instead of being lost, change module, method and named_args instead.
+        """
+        return MappingProxyType({'module': self.module, 'method': self.method, 'args': tuple(self.named_args)})
+
+    def __str__(self):
+        # Script notation, e.g., Stream.select(from="0",to="30")
+        named_args = list(self.named_args)
+        if self.sources:
+            named_args.append((BINDING_FROM, ','.join(self.sources)))
+        if self.into:
+            named_args.append((BINDING_INTO, self.into))
+        return '{m}.{f}({a})'.format(m=MODULE_NAMES.get(self.module, self.module), f=self.method,
+                                     a=','.join('{k}="{v}"'.format(k=k, v=v) for k, v in named_args))
 
 
 class ConcreteNode(abc.ABC):
-    pass
+    __slots__ = ()
 
 
 class ShowImageNode(ConcreteNode):
-    def __init__(self, image: str):
+    def __init__(self, image: str, start: Optional[float] = None, duration: float = DEFAULT_LAYER_SECONDS,
+                 x: Optional[int] = None, y: Optional[int] = None, width: Optional[int] = None,
+                 height: Optional[int] = None):
         super().__init__()
         self.image = image
+        # Seconds, a layer without start follows the previous one (see pyppeteer.render.timeline)
+        self.start = start
+        self.duration = duration
+        # Pixels, None centers the layer
+        self.x = x
+        self.y = y
+        # Scale the image to this size, None keeps its own
+        self.width = width
+        self.height = height
 
 
 class ShowTextNode(ConcreteNode):
-    def __init__(self, text: str):
+    def __init__(self, text: str, start: Optional[float] = None, duration: float = DEFAULT_LAYER_SECONDS,
+                 x: Optional[int] = None, y: Optional[int] = None, size: int = DEFAULT_TEXT_SIZE,
+                 color: tuple[int, int, int] = (255, 255, 255)):
         super().__init__()
         self.text = text
+        self.start = start
+        self.duration = duration
+        # Pixels, None centers the text horizontally and places it above the bottom edge
+        self.x = x
+        self.y = y
+        self.size = size
+        self.color = color
 
 
 class Parser:
-    def __init__(self):
+    def __init__(self, cache: Optional['ParseCache'] = None):
+        self._cache = cache
         self._scanner = Scanner()
         self._cur_token = None
         self._prev_token = None
         self._statements: [StatementNode] = []
 
+    @property
+    def cache(self) -> Optional['ParseCache']:
+        return self._cache
+
     def _next_token(self, peek: bool = False):
         if self._cur_token is not None:
             self._prev_token = self._cur_token
         return self._scanner.next_token(peek)
 
-    @staticmethod
-    def _clean_string(s: str):
-        lines = list(filter(lambda e: len(e), [ln.lstrip() for ln in s.splitlines()]))
-        for ln, _ in enumerate(lines):
-            lines[ln] = ''.join(lines[ln])
-        return '\n'.join(lines) + '\n'
-
     def parse(self, input_str: str) -> [StatementNode]:
-        # Parse given input string
-        # We perform some string cleaning and whitespace removing before actually passing the raw string to the scanner
-        clean_str = self._clean_string(input_str)
+        if self._cache is None:
+            return self._parse(input_str)
+
+        key = self._cache.key(input_str.encode('utf-8'), PARSER_VERSION)
+        statements = self._cache.get(key)
+        if statements is None:
+            statements = self._parse(input_str)
+            self._cache.put(key, statements)
+        return statements
 
+    def _parse(self, input_str: str) -> [StatementNode]:
+        # Parse given input string, whitespace and comments are skipped by the scanner
         self._scanner = Scanner()
         self._prev_token = None
         self._statements = []
-        self._scanner.scan_str(clean_str)
+        self._scanner.scan_str(input_str)
         self._cur_token = self._next_token()
         return self._parse_statements()
 
+    def iter_parse(self, file_or_iterable: Union[TextIO, Iterable[str]]) -> Iterator[StatementNode]:
+        """
+        Parse incrementally and yield each statement as soon as it is complete
+        :param file_or_iterable: Open file or any iterable of lines
+        :return: Iterator of StatementNode
+        """
+        self._scanner = Scanner()
+        self._prev_token = None
+        self._statements = []
+        self._scanner.scan_lines(file_or_iterable)
+        self._cur_token = self._next_token()
+        return self._iter_statements()
+
     def _accept(self, ttype: TokenType):
         if self._cur_token is not None:
             if self._cur_token.ttype == ttype:
@@ -111,21 +197,21 @@ class Parser:
             return TokenType.EOF
 
     def _parse_statements(self) -> [StatementNode]:
-        statements = []
+        return list(self._iter_statements())
 
+    def _iter_statements(self) -> Iterator[StatementNode]:
         if not self._cur_token:
-            return None
+            return
 
         t: TokenType = self._cur_token.ttype
 
         while t in MODULE_TOKEN_TYPES:
-            statements.append(self._parse_statement())
+            yield self._parse_statement()
 
             if self._cur_token is not None:
                 t = self._cur_token.ttype
             else:
                 break
-        return statements
 
     def _parse_statement(self) -> StatementNode:
         node = StatementNode()
@@ -133,8 +219,7 @@ class Parser:
         return node
 
     def _parse_module_call(self) -> MethodCallNode:
-        node = MethodCallNode()
-        node.args['module'] = self._cur_token.ttype.name
+        node = MethodCallNode(module=self._cur_token.ttype.name)
 
         if self._cur_token.ttype in MODULE_TOKEN_TYPES:
             self._accept(self._cur_token.ttype)
@@ -142,11 +227,18 @@ class Parser:
             self._fail('Unexpected token ' + self._cur_token)
 
         self._accept(TokenType.MODULE_DOT)
-        node.args['method'] = self._parse_method_name()
+        node.method = self._parse_method_name()
         self._accept(TokenType.L_PAREN)
-        node.args['args'] = self._parse_named_args()
+        named_args = self._parse_named_args()
         self._accept(TokenType.R_PAREN)
 
+        node.named_args = tuple((k, v) for k, v in named_args if k not in (BINDING_INTO, BINDING_FROM))
+        for key, value in named_args:
+            if key == BINDING_INTO:
+                node.into = value
+            elif key == BINDING_FROM:
+                node.sources = tuple(name.strip() for name in value.split(','))
+
         return node
 
     def _parse_file_desc(self) -> str:
@@ -160,7 +252,7 @@ class Parser:
         self._accept(TokenType.STRING_IDENTIFIER)
         return return_str
 
-    def _parse_named_args(self) -> []:
+    def _parse_named_args(self) -> tuple:
         named_args_tuples = []
         while self._cur_token.ttype in [TokenType.STRING_IDENTIFIER, TokenType.CHAR_COMMA]:
             if self._cur_token.ttype == TokenType.CHAR_COMMA:
@@ -171,5 +263,5 @@ class Parser:
             value = self._cur_token.value
             self._accept(TokenType.STRING)
             named_args_tuples.append((key, value))
-        return named_args_tuples
+        return tuple(named_args_tuples)
 
@@ -0,0 +1,93 @@
+from typing import Callable, Iterable, Iterator, Optional
+
+from pyppeteer.generator import FilterLayerGenerator
+from pyppeteer.parser import StatementNode
+from pyppeteer.symbols.protocol import Stream
+
+
+def statement_key(statement: StatementNode) -> tuple:
+    node = statement.node
+    return node.module, node.method, node.named_args, node.into, node.sources
+
+
+class _TrieNode:
+    __slots__ = ('statement', 'children', 'scripts')
+
+    def __init__(self, statement: Optional[StatementNode] = None):
+        self.statement = statement
+        self.children: dict[tuple, _TrieNode] = {}
+        # Indices of the scripts ending after this statement
+        self.scripts: [int] = []
+
+    def iter_scripts(self) -> Iterator[int]:
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            yield from node.scripts
+            stack.extend(node.children.values())
+
+
+class PrefixTrie:
+    """
+    Statements of many scripts merged by their common prefixes, each trie node is executed once for all
+    scripts sharing it
+    """
+
+    def __init__(self):
+        self.root = _TrieNode()
+        self.script_count = 0
+        # Statements of all scripts, i.e., executions needed without sharing
+        self.statement_count = 0
+        self.node_count = 0
+
+    def add(self, statements: Iterable[StatementNode]) -> int:
+        """
+        :return: Index of the script
+        """
+        node = self.root
+        for statement in statements:
+            key = statement_key(statement)
+            child = node.children.get(key)
+            if child is None:
+                child = node.children[key] = _TrieNode(statement)
+                self.node_count += 1
+            node = child
+            self.statement_count += 1
+        node.scripts.append(self.script_count)
+        self.script_count += 1
+        return self.script_count - 1
+
+    def run(self, on_output: Callable[[int, Stream], None], on_error: Callable[[int, Exception], None],
+            input_stream: Stream = '', generator: Optional[FilterLayerGenerator] = None) -> int:
+        """
+        Execute all scripts depth first. Streams are only materialized where scripts diverge,
+        a chain of statements shared by the same scripts runs lazily like a single script.
+        :param on_output: Called with the script index and its output stream as soon as a script is complete
+        :param on_error: Called for every script below a failing statement
+        :return: Number of executed statements
+        """
+        generator = generator or FilterLayerGenerator()
+        executed = 0
+        stack = [(self.root, (0, input_stream, {}, ()))]
+        while stack:
+            node, state = stack.pop()
+            generator.restore(state)
+            try:
+                while True:
+                    if node.statement is not None:
+                        generator.generate(node.statement)
+                        executed += 1
+                    if len(node.children) == 1 and not node.scripts:
+                        node = next(iter(node.children.values()))
+                        continue
+                    break
+                state = generator.snapshot()
+            except Exception as e:
+                for script in node.iter_scripts():
+                    on_error(script, e)
+                continue
+
+            for script in node.scripts:
+                on_output(script, state[1])
+            stack.extend((child, state) for child in reversed(node.children.values()))
+        return executed
@@ -0,0 +1,234 @@
+"""
+Frame renderer for the layers collected by FilterLayerGenerator (ShowTextNode, ShowImageNode).
+Requires NumPy, text layers and images other than .npy arrays require Pillow.
+"""
+import math
+import os
+from typing import BinaryIO, Iterable, Iterator, Optional, Union
+
+import numpy as np
+
+from pyppeteer.parser import ConcreteNode, ShowImageNode, ShowTextNode
+
+DEFAULT_FPS = 25
+
+FORMATS = ('y4m', 'rgb')
+
+# BT.601 studio range RGB -> YCbCr, rows are Y, Cb, Cr
+_YUV_MATRIX = np.array([[65.481, 128.553, 24.966],
+                        [-37.797, -74.203, 112.0],
+                        [112.0, -93.786, -18.214]], dtype=np.float32) / 255
+# Including 0.5 to round when converting to uint8
+_YUV_OFFSET = np.array([16.5, 128.5, 128.5], dtype=np.float32)
+
+
+def _pil():
+    try:
+        from PIL import Image, ImageDraw, ImageFont
+    except ImportError:
+        raise ImportError('Rendering text and decoding images requires Pillow (pip install Pillow)') from None
+    return Image, ImageDraw, ImageFont
+
+
+class Sprite:
+    """
+    Rasterized layer: RGB pixels and an optional alpha mask (None for opaque sprites)
+    """
+    __slots__ = ('rgb', 'alpha')
+
+    def __init__(self, rgb: np.ndarray, alpha: Optional[np.ndarray] = None):
+        self.rgb = rgb
+        self.alpha = alpha
+
+    @property
+    def shape(self) -> tuple[int, int]:
+        return self.alpha.shape if self.rgb.ndim == 1 else self.rgb.shape[:2]
+
+
+class SpriteCache:
+    """
+    Rasterized text and decoded images, shared by all frames and layers showing the same content
+    """
+
+    def __init__(self):
+        self._sprites: dict[tuple, Sprite] = {}
+        self._fonts: dict[int, object] = {}
+
+    def get(self, layer: ConcreteNode) -> Sprite:
+        if isinstance(layer, ShowTextNode):
+            key = ('text', layer.text, layer.size, layer.color)
+            make = self._text
+        elif isinstance(layer, ShowImageNode):
+            stat = os.stat(layer.image)
+            key = ('image', layer.image, stat.st_mtime_ns, layer.width, layer.height)
+            make = self._image
+        else:
+            raise TypeError('Cannot render {n}'.format(n=type(layer).__name__))
+        sprite = self._sprites.get(key)
+        if sprite is None:
+            sprite = self._sprites[key] = make(layer)
+        return sprite
+
+    def _font(self, size: int):
+        font = self._fonts.get(size)
+        if font is None:
+            _, _, image_font = _pil()
+            try:
+                font = image_font.truetype('DejaVuSans.ttf', size)
+            except OSError:
+                font = image_font.load_default(size)
+            self._fonts[size] = font
+        return font
+
+    def _text(self, layer: ShowTextNode) -> Sprite:
+        image, image_draw, _ = _pil()
+        font = self._font(layer.size)
+        left, top, right, bottom = image_draw.Draw(image.new('L', (1, 1))).multiline_textbbox(
+            (0, 0), layer.text, font=font, align='center')
+        mask = image.new('L', (max(1, right - left), max(1, bottom - top)))
+        image_draw.Draw(mask).multiline_text((-left, -top), layer.text, fill=255, font=font, align='center')
+        # A single color for the whole sprite, the mask carries the glyph shapes and their antialiasing
+        return Sprite(np.array(layer.color, dtype=np.uint8), np.asarray(mask, dtype=np.uint8))
+
+    @staticmethod
+    def _image(layer: ShowImageNode) -> Sprite:
+        if layer.image.endswith('.npy'):
+            pixels = np.load(layer.image)
+            if pixels.ndim == 2:
+                pixels = np.repeat(pixels[:, :, None], 3, axis=2)
+        else:
+            image, _, _ = _pil()
+            with image.open(layer.image) as img:
+                if layer.width or layer.height:
+                    img = img.resize((layer.width or img.width, layer.height or img.height))
+                pixels = np.asarray(img.convert('RGBA' if 'A' in img.getbands() else 'RGB'))
+        pixels = pixels.astype(np.uint8, copy=False)
+        if pixels.shape[2] == 4:
+            alpha = pixels[:, :, 3]
+            if alpha.min() < 255:
+                return Sprite(np.ascontiguousarray(pixels[:, :, :3]), np.ascontiguousarray(alpha))
+            pixels = pixels[:, :, :3]
+        return Sprite(np.ascontiguousarray(pixels))
+
+
+def timeline(layers: Iterable[ConcreteNode]) -> list[tuple[float, float, ConcreteNode]]:
+    """
+    (start, end, layer) in seconds, a layer without start begins when the previous layer ends
+    """
+    entries = []
+    cursor = 0.0
+    for layer in layers:
+        start = cursor if layer.start is None else layer.start
+        cursor = start + layer.duration
+        entries.append((start, cursor, layer))
+    return entries
+
+
+class Renderer:
+    """
+    Composites layers into frames of width x height with NumPy and streams them to a file.
+    Frames showing the same set of layers as the previous one are written again without compositing.
+    """
+
+    def __init__(self, width: int, height: int, fps: int = DEFAULT_FPS, background: tuple = (0, 0, 0)):
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self._background = np.empty((height, width, 3), dtype=np.uint8)
+        self._background[:] = background
+        self.sprites = SpriteCache()
+        self.frames = 0
+        self.composited = 0
+
+    def render(self, layers: Iterable[ConcreteNode], out: Union[str, BinaryIO], fmt: Optional[str] = None) -> int:
+        """
+        :param out: File path or binary file
+        :param fmt: y4m or rgb (raw rgb24), by default taken from the file extension
+        :return: Number of frames written
+        """
+        if fmt is None:
+            fmt = 'y4m' if isinstance(out, str) and out.endswith('.y4m') else 'rgb'
+        if fmt not in FORMATS:
+            raise ValueError('Unknown video format {f}, expected one of {e}'.format(f=fmt, e=', '.join(FORMATS)))
+
+        if isinstance(out, str):
+            with open(out, 'wb') as file:
+                return self.render(layers, file, fmt)
+
+        if fmt == 'y4m':
+            out.write('YUV4MPEG2 W{w} H{h} F{f}:1 Ip A1:1 C444\n'.format(
+                w=self.width, h=self.height, f=self.fps).encode('ascii'))
+        encode = self._encode_y4m if fmt == 'y4m' else self._encode_rgb
+        count = 0
+        for frame in self.iter_frames(layers, encode):
+            out.write(frame)
+            count += 1
+        return count
+
+    def iter_frames(self, layers: Iterable[ConcreteNode], encode=None) -> Iterator[bytes]:
+        """
+        Encoded frames one by one, only the current frame is held in memory
+        """
+        encode = encode or self._encode_rgb
+        entries = timeline(layers)
+        if not entries:
+            return
+        frame_count = math.ceil(max(end for _, end, _ in entries) * self.fps)
+        previous_active = None
+        encoded = b''
+        for index in range(frame_count):
+            t = index / self.fps
+            active = tuple(i for i, (start, end, _) in enumerate(entries) if start <= t < end)
+            if active != previous_active:
+                encoded = encode(self.composite([entries[i][2] for i in active]))
+                previous_active = active
+                self.composited += 1
+            self.frames += 1
+            yield encoded
+
+    def composite(self, layers: Iterable[ConcreteNode]) -> np.ndarray:
+        frame = self._background.copy()
+        for layer in layers:
+            self._blit(frame, self.sprites.get(layer), layer)
+        return frame
+
+    def _position(self, layer: ConcreteNode, height: int, width: int) -> tuple[int, int]:
+        # Centered by default, text sits above the bottom edge like subtitles
+        x = (self.width - width) // 2 if layer.x is None else layer.x
+        if layer.y is not None:
+            y = layer.y
+        elif isinstance(layer, ShowTextNode):
+            y = self.height - height - self.height // 10
+        else:
+            y = (self.height - height) // 2
+        return y, x
+
+    def _blit(self, frame: np.ndarray, sprite: Sprite, layer: ConcreteNode):
+        height, width = sprite.shape
+        y, x = self._position(layer, height, width)
+        # Clip the sprite to the frame
+        y0, x0 = max(y, 0), max(x, 0)
+        y1, x1 = min(y + height, self.height), min(x + width, self.width)
+        if y0 >= y1 or x0 >= x1:
+            return
+        region = frame[y0:y1, x0:x1]
+        sy, sx = slice(y0 - y, y1 - y), slice(x0 - x, x1 - x)
+        rgb = sprite.rgb if sprite.rgb.ndim == 1 else sprite.rgb[sy, sx]
+        if sprite.alpha is None:
+            region[:] = rgb
+            return
+        alpha = sprite.alpha[sy, sx, None].astype(np.uint16)
+        # Integer alpha blending of the whole region at once, rounded
+        region[:] = (rgb * alpha + region * (255 - alpha) + 127) // 255
+
+    @staticmethod
+    def _encode_rgb(frame: np.ndarray) -> bytes:
+        return frame.tobytes()
+
+    @staticmethod
+    def _encode_y4m(frame: np.ndarray) -> bytes:
+        # Planar layout first, the matrix product then runs over contiguous rows
+        planes = np.moveaxis(frame, 2, 0).reshape(3, -1).astype(np.float32)
+        yuv = _YUV_MATRIX @ planes
+        yuv += _YUV_OFFSET[:, None]
+        return b'FRAME\n' + yuv.clip(0, 255).astype(np.uint8).tobytes()
@@ -0,0 +1,133 @@
+import hashlib
+import os
+import tempfile
+from collections import OrderedDict
+from typing import Callable, Mapping, Optional, Union
+
+from pyppeteer.mapped_text import MappedText
+from pyppeteer.symbols.protocol import BINARY_TYPES, Binary, cache_key_of
+
+_SUFFIX = '.out'
+# First byte of a result file, files without a known tag are UTF-8 text
+_TEXT = b'\x00'
+_BINARY = b'\x01'
+_HASH_CHUNK = 1 << 20
+
+
+def stream_digest(stream: Union[str, MappedText, bytes, memoryview]) -> str:
+    digest = hashlib.blake2b(digest_size=20)
+    if isinstance(stream, MappedText):
+        for chunk in stream.iter_bytes(_HASH_CHUNK):
+            digest.update(chunk)
+    elif isinstance(stream, BINARY_TYPES):
+        digest.update(stream)
+    else:
+        # Encode piecewise to avoid a second full copy of large streams
+        for i in range(0, len(stream), _HASH_CHUNK):
+            digest.update(stream[i:i + _HASH_CHUNK].encode('utf-8', 'surrogatepass'))
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """
+    Content-addressed cache of statement outputs keyed by (module, method, named args, input kind, input hash).
+    Results are kept in an in-memory LRU tier and, with a directory, in an on-disk tier; both are bounded in bytes.
+    Symbols opt out or add key material (e.g., file mtime and size) with protocol.cache_key / protocol.non_cacheable.
+    """
+
+    def __init__(self, max_bytes: int = 256 * 1024 * 1024, directory: Optional[str] = None,
+                 max_disk_bytes: int = 1024 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.directory = directory
+        self.max_disk_bytes = max_disk_bytes
+        self._memory: OrderedDict[str, tuple[Union[str, MappedText, Binary], int]] = OrderedDict()
+        self._memory_bytes = 0
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.bytes_saved = 0
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def key(self, label: str, func: Callable, named_args: Mapping, stream) -> Optional[str]:
+        """
+        :return: Cache key or None if the symbol is not cacheable
+        """
+        extra = cache_key_of(func, named_args)
+        if extra is False:
+            return None
+        # A str and its UTF-8 bytes hash the same, symbols accepting both may still treat them differently
+        kind = 'binary' if isinstance(stream, BINARY_TYPES) else 'text'
+        material = repr((label, sorted(named_args.items()), extra, kind, stream_digest(stream)))
+        return hashlib.blake2b(material.encode('utf-8'), digest_size=20).hexdigest()
+
+    def get(self, key: str) -> Optional[Union[str, MappedText, Binary]]:
+        entry = self._memory.get(key)
+        if entry is not None:
+            self._memory.move_to_end(key)
+            self.memory_hits += 1
+            self.bytes_saved += entry[1]
+            return entry[0]
+
+        if self.directory:
+            path = os.path.join(self.directory, key + _SUFFIX)
+            try:
+                with open(path, 'rb') as file:
+                    data = file.read()
+            except OSError:
+                pass
+            else:
+                from pyppeteer.memory_governor import stream_bytes
+                os.utime(path)
+                tag = data[:1]
+                if tag == _BINARY:
+                    value = memoryview(data)[1:]
+                else:
+                    value = str(memoryview(data)[1:] if tag == _TEXT else data, 'utf-8')
+                self.disk_hits += 1
+                self.bytes_saved += stream_bytes(value)
+                self._remember(key, value)
+                return value
+
+        self.misses += 1
+        return None
+
+    def put(self, key: str, value: Union[str, MappedText, Binary]) -> None:
+        self._remember(key, value)
+        if self.directory:
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory)
+            with os.fdopen(fd, 'wb') as file:
+                if isinstance(value, BINARY_TYPES):
+                    file.write(_BINARY)
+                    file.write(value)
+                elif isinstance(value, MappedText):
+                    file.write(_TEXT)
+                    for chunk in value.iter_bytes(_HASH_CHUNK):
+                        file.write(chunk)
+                else:
+                    file.write(_TEXT)
+                    file.write(value.encode('utf-8'))
+            os.replace(tmp_path, os.path.join(self.directory, key + _SUFFIX))
+            from pyppeteer.parse_cache import evict_lru
+            evict_lru(self.directory, _SUFFIX, self.max_disk_bytes)
+
+    def _remember(self, key: str, value: Union[str, MappedText, Binary]) -> None:
+        from pyppeteer.memory_governor import stream_bytes
+        size = stream_bytes(value)
+        if size > self.max_bytes:
+            return
+        previous = self._memory.pop(key, None)
+        if previous is not None:
+            self._memory_bytes -= previous[1]
+        self._memory[key] = (value, size)
+        self._memory_bytes += size
+        while self._memory_bytes > self.max_bytes:
+            _, (_, evicted_size) = self._memory.popitem(last=False)
+            self._memory_bytes -= evicted_size
+
+    def stats(self) -> dict:
+        hits = self.memory_hits + self.disk_hits
+        lookups = hits + self.misses
+        return {'memory_hits': self.memory_hits, 'disk_hits': self.disk_hits, 'misses': self.misses,
+                'hit_rate': hits / lookups if lookups else 0.0, 'bytes_saved': self.bytes_saved,
+                'memory_bytes': self._memory_bytes}
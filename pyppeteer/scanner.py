@@ -1,7 +1,10 @@
 from __future__ import annotations
 
 import enum
-from typing import Optional
+import re
+from array import array
+from sys import intern
+from typing import Iterable, Iterator, Optional
 from pyppeteer.exceptions import ScanWrongTokenException
 
 
@@ -48,6 +51,8 @@ class Unit:
 
 
 class Token(object):
+    __slots__ = ('ttype', 'value', 'meta_cn')
+
     def __init__(self, ttype: TokenType, cn: int, value=None):
         self.ttype = ttype
         self.value = value
@@ -60,226 +65,195 @@ class Token(object):
         return self.__str__()
 
 
+_TOKEN_TYPES = {t.value: t for t in TokenType}
+
+# String values up to this length are interned, argument names and short values repeat throughout a script
+INTERN_MAX_LENGTH = 64
+
+
+class TokenBuffer:
+    """
+    Compact token stream: parallel arrays of token types, character offsets and indices into a table of distinct values
+    """
+    __slots__ = ('types', 'offsets', 'value_ids', 'values', '_value_index')
+
+    def __init__(self):
+        self.types = array('H')
+        self.offsets = array('I')
+        self.value_ids = array('I')
+        self.values = [None]
+        self._value_index = {None: 0}
+
+    def append(self, token: Token) -> None:
+        value_id = self._value_index.get(token.value)
+        if value_id is None:
+            value_id = self._value_index[token.value] = len(self.values)
+            self.values.append(token.value)
+        self.types.append(token.ttype.value)
+        self.offsets.append(token.meta_cn)
+        self.value_ids.append(value_id)
+
+    def __len__(self):
+        return len(self.types)
+
+    def __getitem__(self, i: int) -> Token:
+        return Token(_TOKEN_TYPES[self.types[i]], self.offsets[i], self.values[self.value_ids[i]])
+
+    def __iter__(self) -> Iterator[Token]:
+        values = self.values
+        for ttype, cn, value_id in zip(self.types, self.offsets, self.value_ids):
+            yield Token(_TOKEN_TYPES[ttype], cn, values[value_id])
+
+
+KEYWORDS = {
+    'NLP': TokenType.MODULE_NLP,
+    'Tab': TokenType.MODULE_TAB,
+    'Std': TokenType.MODULE_STD,
+    'Conv': TokenType.MODULE_CONV,
+    'Enc': TokenType.MODULE_ENC,
+    'Read': TokenType.MODULE_READ,
+    'AI': TokenType.MODULE_AI,
+    'List': TokenType.MODULE_LIST,
+    'Enum': TokenType.MODULE_ENUM,
+    'Stat': TokenType.MODULE_STAT,
+    'QR': TokenType.MODULE_QR,
+    'Exp': TokenType.MODULE_EXP,
+    'Encr': TokenType.MODULE_ENCR,
+    'Web': TokenType.MODULE_WEB,
+    'Color': TokenType.MODULE_COLOR,
+    'Stream': TokenType.MODULE_STREAM
+}
+
+PUNCTUATION = {
+    ':': TokenType.CHAR_COLON,
+    ',': TokenType.CHAR_COMMA,
+    '(': TokenType.L_PAREN,
+    ')': TokenType.R_PAREN,
+    '=': TokenType.CHAR_EQUALS,
+    '.': TokenType.MODULE_DOT
+}
+
+# Single master pattern, alternatives are tried in order (a leading dot followed by a digit is a number, not a dot)
+TOKEN_PATTERN = re.compile(r'''
+    (?P<WHITESPACE>\s+)
+  | (?P<IDENTIFIER>[^\W\d]\w*)
+  | (?P<PUNCTUATION>[:,()=]|\.(?!\d))
+  | (?P<STRING>["'][^"']*["'])
+  | (?P<COMMENT>\#[^\n]*)
+  | (?P<HEX>0[xX][0-9A-Fa-f]+)
+  | (?P<NUMBER>\d+\.?\d*|\.\d+)
+  | (?P<OPEN_STRING>["'])
+  | (?P<MISMATCH>.)
+''', re.VERBOSE)
+
+
 class Scanner:
     """
     Tokenizer
     """
 
     def __init__(self):
-        self._str_stream: str = ''
+        self._tokens: Iterator[Token] = iter(())
+        self._peeked: Optional[Token] = None
         self._char_offset: int = 0
-        self._cur_char: str = ''
-        self._str_len: int = 0
-        self._opening_str: bool = False
 
     def scan_str(self, input_str: str) -> None:
         """
         Tokenize given input stream of type str
         :param input_str: Stream
         """
-        self._str_stream = input_str
-        self._str_len = len(self._str_stream)
+        self._tokens = self._tokenize(input_str)
+        self._peeked = None
+        self._char_offset = 0
+
+    def scan_tokens(self, tokens: Iterable[Token]) -> None:
+        """
+        Replay an already tokenized stream, e.g., a TokenBuffer
+        """
+        self._tokens = iter(tokens)
+        self._peeked = None
+        self._char_offset = 0
+
+    def tokenize(self, input_str: str) -> TokenBuffer:
+        """
+        Tokenize the complete input into a compact TokenBuffer
+        """
+        buffer = TokenBuffer()
+        for token in self._tokenize(input_str):
+            buffer.append(token)
+        return buffer
+
+    def scan_lines(self, lines: Iterable[str]) -> None:
+        """
+        Tokenize lazily from an iterable of lines (e.g., an open file), only the current line is held in memory
+        :param lines: Lines including their line endings
+        """
+        self._tokens = self._tokenize_lines(lines)
+        self._peeked = None
         self._char_offset = 0
-        self._cur_char = self._str_stream[self._char_offset]
 
     def next_token(self, peek: bool = False) -> Optional[Token]:
         """
         Get next available token
-        :return: Token instance
+        :param peek: Return the next token without consuming it
+        :return: Token instance or None on EOF
         """
-        while self._cur_char is not None:
-            if self._cur_char.isspace():
-                self._skip_whitespace()
-                if self._cur_char is None:
-                    return
-
-            if self._cur_char == '#':
-                # Skip comments
-                while self._cur_char not in [None, '\n']:
-                    self._advance(peek)
-                self._advance()
+        if self._peeked is None:
+            self._peeked = next(self._tokens, None)
+        token = self._peeked
+        if not peek:
+            self._peeked = None
+        return token
+
+    def _tokenize_lines(self, lines: Iterable[str]) -> Iterator[Token]:
+        offset = 0
+        buffer = ''
+        for line in lines:
+            buffer += line
+            # Strings may span multiple lines, keep everything from the opening quote for the next round
+            pending = yield from self._tokenize(buffer, offset, partial=True)
+            if pending is None:
+                offset += len(buffer)
+                buffer = ''
+            else:
+                offset += pending
+                buffer = buffer[pending:]
+        if buffer:
+            yield from self._tokenize(buffer, offset)
+
+    def _tokenize(self, input_str: str, base: int = 0, partial: bool = False) -> Iterator[Token]:
+        keywords = KEYWORDS
+        punctuation = PUNCTUATION
+        for match in TOKEN_PATTERN.finditer(input_str):
+            kind = match.lastgroup
+            if kind == 'WHITESPACE' or kind == 'COMMENT':
                 continue
 
-            if self._cur_char == ':':
-                # Define
-                self._advance(peek)
-                return Token(TokenType.CHAR_COLON, cn=self._char_offset)
-
-            if self._cur_char == '(':
-                self._advance(peek)
-                return Token(TokenType.L_PAREN, cn=self._char_offset)
-
-            if self._cur_char == ')':
-                self._advance(peek)
-                return Token(TokenType.R_PAREN, cn=self._char_offset)
-
-            if self._cur_char == '=':
-                self._advance(peek)
-                return Token(TokenType.CHAR_EQUALS, cn=self._char_offset)
-
-            if self._cur_char == ',':
-                # List of coordinates
-                self._advance(peek)
-                return Token(TokenType.CHAR_COMMA, cn=self._char_offset)
-
-            if self._cur_char.isdigit() or self._cur_char == '.':
-                if self._cur_char == '.' and not self._peek().isdigit():
-                    self._advance()
-                    return Token(TokenType.MODULE_DOT, cn=self._char_offset, value='')
-                tmp_value = self._scan_number_or_duration(self._cur_char)
-                if type(tmp_value) == float:
-                    return Token(TokenType.NUMBER, cn=self._char_offset, value=tmp_value)
-                else:
-                    return Token(TokenType.UNIT, cn=self._char_offset, value=tmp_value)
-
-            if self._cur_char in ['"', '\'']:
-                if self._opening_str:
-                    raise ScanWrongTokenException('Missing closing quotes')
-                return Token(TokenType.STRING, cn=self._char_offset, value=self._scan_string())
-
-            if self._cur_char.isalpha() or self._cur_char == '_':
-                return self._scan_keyword()
-
-            raise ScanWrongTokenException('Wrong character {c} at {o}'.format(c=self._cur_char, o=self._char_offset))
-
-    def _advance(self, peek: bool = False) -> None:
-        if peek:
-            return
-        if self._char_offset + 1 < self._str_len:
-            self._char_offset += 1
-            self._cur_char = self._str_stream[self._char_offset]
-        else:
-            self._scan_complete()
-
-    def _peek(self, off: int = 0) -> Optional[str]:
-        if self._char_offset < self._str_len:
-            return self._str_stream[self._char_offset + off]
-        else:
-            return None
-
-    def _scan_complete(self) -> None:
-        self._cur_char = None
-
-    def _skip_whitespace(self) -> None:
-        while self._cur_char is not None and self._cur_char.isspace():
-            self._advance()
-
-    def _scan_number_or_duration(self, first_char='') -> [float | Unit]:
-        tmp_num = ''
-        off = 0
-        scan_float = False
-        scan_hex = False
-        scan_unit = False
-        unit = ''
-        number: float
-        while self._cur_char is not None and (
-                self._cur_char.isalpha() or self._cur_char.isdigit() or self._cur_char in ['.', 'x']):
-            if off == 0:
-                if self._cur_char == '0' and self._peek(1).lower() == 'x':
-                    self._advance()
-                    self._advance()
-                    scan_hex = True
-                    scan_float = False
-
-            if self._cur_char == '.':
-                # Leading dot without digit (.3)
-                if not scan_float:
-                    self._advance()
-                    tmp_num += '.'
-                    scan_float = True
+            cn = base + match.start()
+            self._char_offset = cn
+            value = match.group()
+
+            if kind == 'IDENTIFIER':
+                ttype = keywords.get(value)
+                if ttype is not None:
+                    yield Token(ttype, cn)
                 else:
-                    raise ScanWrongTokenException()
-
-            if self._cur_char.isdigit() or (scan_hex and self._cur_char.upper() in ['A', 'B', 'C', 'D', 'E', 'F']):
-                tmp_num += self._cur_char
-            # else:
-            #     raise ScanWrongTokenException('Illegal number at {o}'.format(o=self._char_offset))
-                self._advance()
-                off += 1
-
-        if scan_hex:
-            number = float(int('0x' + tmp_num, 16))
-        else:
-            number = float(tmp_num)
-
-        if scan_unit:
-            return Unit(quantity=number, unit=unit)
-        return number
-
-    def _scan_string(self) -> str:
-        self._opening_str = True
-        tmp_str = ''
-        self._advance()
-        while self._cur_char is not None and self._cur_char not in ['"', '\'']:
-            tmp_str += self._cur_char
-            self._advance()
-
-        if self._cur_char in ['"', '\'']:
-            self._advance()
-            self._opening_str = False
-            return tmp_str
-        else:
-            raise ScanWrongTokenException()
-
-    # def _scan_identifier(self) -> Token:
-    #     tmp_str = ''
-    #     while self._cur_char is not None and (
-    #             self._cur_char.isalpha() or self._cur_char.isdigit() or self._cur_char == '_'):
-    #         tmp_str += self._cur_char
-    #         self._advance()
-    #     return Token(TokenType.STRING_IDENTIFIER, cn=self._char_offset, value=tmp_str)
-
-    def _scan_keyword(self) -> Token:
-        off = 0
-        tmp_str = ''
-        while self._cur_char is not None and (
-                self._cur_char.isalpha() or self._cur_char.isdigit() or self._cur_char == '_'):
-            if self._cur_char.isdigit() and off == 0:
-                raise ScanWrongTokenException('Identifiers must not start with a digit')
-            tmp_str += self._cur_char
-            self._advance()
-            off += 1
-
-        slen = len(tmp_str)
-        if slen == 2:
-            if tmp_str == 'AI':
-                return Token(TokenType.MODULE_AI, cn=self._char_offset)
-            elif tmp_str == 'QR':
-                return Token(TokenType.MODULE_QR, cn=self._char_offset)
-        elif slen == 3:
-            if tmp_str == 'NLP':
-                return Token(TokenType.MODULE_NLP, cn=self._char_offset)
-            elif tmp_str == 'Tab':
-                return Token(TokenType.MODULE_TAB, cn=self._char_offset)
-            elif tmp_str == 'Std':
-                return Token(TokenType.MODULE_STD, cn=self._char_offset)
-            elif tmp_str == 'Enc':
-                return Token(TokenType.MODULE_ENC, cn=self._char_offset)
-            elif tmp_str == 'Exp':
-                return Token(TokenType.MODULE_EXP, cn=self._char_offset)
-            elif tmp_str == 'Web':
-                return Token(TokenType.MODULE_WEB, cn=self._char_offset)
-        elif slen == 4:
-            if tmp_str == 'Conv':
-                return Token(TokenType.MODULE_CONV, cn=self._char_offset)
-            elif tmp_str == 'Read':
-                return Token(TokenType.MODULE_READ, cn=self._char_offset)
-            elif tmp_str == 'List':
-                return Token(TokenType.MODULE_LIST, cn=self._char_offset)
-            elif tmp_str == 'Enum':
-                return Token(TokenType.MODULE_ENUM, cn=self._char_offset)
-            elif tmp_str == 'Stat':
-                return Token(TokenType.MODULE_STAT, cn=self._char_offset)
-            elif tmp_str == 'Encr':
-                return Token(TokenType.MODULE_ENCR, cn=self._char_offset)
-        elif slen == 5:
-            if tmp_str == 'Color':
-                return Token(TokenType.MODULE_COLOR, cn=self._char_offset)
-        elif slen == 6:
-            if tmp_str == 'Stream':
-                return Token(TokenType.MODULE_STREAM, cn=self._char_offset)
-
-        return Token(TokenType.STRING_IDENTIFIER, cn=self._char_offset, value=tmp_str)
+                    yield Token(TokenType.STRING_IDENTIFIER, cn, intern(value))
+            elif kind == 'PUNCTUATION':
+                yield Token(punctuation[value], cn, '' if value == '.' else None)
+            elif kind == 'STRING':
+                value = value[1:-1]
+                yield Token(TokenType.STRING, cn, intern(value) if len(value) <= INTERN_MAX_LENGTH else value)
+            elif kind == 'NUMBER':
+                yield Token(TokenType.NUMBER, cn=cn, value=float(value))
+            elif kind == 'HEX':
+                yield Token(TokenType.NUMBER, cn=cn, value=float(int(value, 16)))
+            elif kind == 'OPEN_STRING':
+                if partial:
+                    return match.start()
+                raise ScanWrongTokenException('Missing closing quotes')
+            else:
+                raise ScanWrongTokenException('Wrong character {c} at {o}'.format(c=value, o=cn))
 
     @property
     def char_offset(self):
@@ -0,0 +1,78 @@
+from concurrent.futures import Executor, FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Mapping, Optional, Sequence
+
+from pyppeteer.symbols.protocol import Stream, call_symbol, join_streams, materialize, to_text
+
+# Name of the implicit stream read and written by statements without bindings
+DEFAULT_STREAM = ''
+
+
+def build_graph(steps: Sequence[tuple]) -> tuple[list[tuple], Optional[int]]:
+    """
+    Dependencies of every step on the steps producing its input streams (None: the initial stream)
+    :param steps: (label, func, named_args, into, sources) tuples of an ExecutionPlan
+    :return: Dependencies per step and the index of the step producing the final default stream
+    """
+    producers = {}
+    graph = []
+    for i, (_, _, _, into, sources) in enumerate(steps):
+        graph.append(tuple((name, producers.get(name)) for name in (sources or (DEFAULT_STREAM,))))
+        producers[into or DEFAULT_STREAM] = i
+    return graph, producers.get(DEFAULT_STREAM)
+
+
+def _execute(func: Callable, stream: Stream, named_args: Mapping, to_str: bool) -> Stream:
+    out_stream = materialize(call_symbol(func, stream, named_args))
+    return str(to_text(out_stream)) if to_str else out_stream
+
+
+def run_dataflow(steps: Sequence[tuple], input_stream: Stream = '', executor: Optional[Executor] = None) -> Stream:
+    """
+    Run steps as soon as all streams they read are available, independent branches run concurrently on executor
+    (a thread pool by default). With other executors than thread pools (e.g., process pools) streams are passed as str.
+    """
+    graph, final = build_graph(steps)
+    if final is None:
+        return input_stream
+
+    own_executor = executor is None
+    executor = executor or ThreadPoolExecutor()
+    to_str = not isinstance(executor, ThreadPoolExecutor)
+
+    # Results are dropped once all their consumers have started
+    consumers = [0] * len(steps)
+    for deps in graph:
+        for _, producer in deps:
+            if producer is not None:
+                consumers[producer] += 1
+    consumers[final] += 1
+
+    results = {}
+    pending = list(range(len(steps)))
+    running = {}
+    try:
+        while pending or running:
+            for i in [i for i in pending if all(p is None or p in results for _, p in graph[i])]:
+                pending.remove(i)
+                values = []
+                for name, producer in graph[i]:
+                    if producer is None:
+                        values.append(input_stream if name == DEFAULT_STREAM else '')
+                        continue
+                    values.append(results[producer])
+                    consumers[producer] -= 1
+                    if not consumers[producer]:
+                        del results[producer]
+                stream = values[0] if len(values) == 1 else join_streams(values)
+                if to_str:
+                    stream = str(to_text(materialize(stream)))
+                _, func, named_args, _, _ = steps[i]
+                running[executor.submit(_execute, func, stream, dict(named_args), to_str)] = i
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                results[running.pop(future)] = future.result()
+    finally:
+        if own_executor:
+            executor.shutdown(wait=True, cancel_futures=True)
+    return results[final]
@@ -0,0 +1,205 @@
+import hashlib
+import json
+import logging
+import os
+import signal
+import socketserver
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+from pyppeteer.client import parse_address
+from pyppeteer.generator import ExecutionPlan, FilterLayerGenerator
+from pyppeteer.parser import Parser
+from pyppeteer.symbols.protocol import encode_chunks, iter_chunks
+from pyppeteer.symbols.symbols import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+# Compiled scripts kept per worker process
+PLAN_CACHE_SIZE = 256
+
+# Limit for request bodies (script and input)
+MAX_REQUEST_BYTES = 256 * 1024 * 1024
+
+
+class PlanCache:
+    """
+    LRU cache of compiled scripts keyed by the hash of their source
+    """
+
+    def __init__(self, max_entries: int = PLAN_CACHE_SIZE):
+        self.max_entries = max_entries
+        self.parser = Parser()
+        self.hits = 0
+        self.misses = 0
+        self._plans: OrderedDict[str, ExecutionPlan] = OrderedDict()
+
+    def get(self, script: str) -> ExecutionPlan:
+        key = hashlib.sha256(script.encode('utf-8')).hexdigest()
+        plan = self._plans.get(key)
+        if plan is not None:
+            self.hits += 1
+            self._plans.move_to_end(key)
+            return plan
+
+        self.misses += 1
+        plan = FilterLayerGenerator().compile(self.parser.parse(script))
+        self._plans[key] = plan
+        while len(self._plans) > self.max_entries:
+            self._plans.popitem(last=False)
+        return plan
+
+
+# Created once per worker process by _init_worker
+_plans: Optional[PlanCache] = None
+
+
+def _init_worker(cache_size: int):
+    global _plans
+    # Parser, symbol modules and the plan cache stay warm for the lifetime of the worker
+    _plans = PlanCache(cache_size)
+    # The registry imports symbol modules on first lookup, load them all before the first request
+    for name in REGISTRY:
+        REGISTRY.methods(name)
+
+
+def _execute(script: str, input_text: str, cwd: Optional[str]) -> tuple[bytes, bool]:
+    # Workers run one task at a time, so changing the directory does not affect other requests.
+    # It is restored afterwards, the next request of this worker may not pass one
+    previous = os.getcwd()
+    try:
+        if cwd:
+            os.chdir(cwd)
+        hits = _plans.hits
+        plan = _plans.get(script)
+        output = b''.join(encode_chunks(iter_chunks(plan.run(input_text))))
+        return output, _plans.hits > hits
+    finally:
+        os.chdir(previous)
+
+
+class ScriptServer:
+    """
+    Executes scripts on a pool of warm worker processes
+    """
+
+    def __init__(self, jobs: Optional[int] = None, cache_size: int = PLAN_CACHE_SIZE):
+        self.jobs = jobs or os.cpu_count() or 1
+        self._executor = ProcessPoolExecutor(max_workers=self.jobs, initializer=_init_worker,
+                                             initargs=(cache_size,))
+        self._lock = threading.Lock()
+        self._stats = {'requests': 0, 'errors': 0, 'plan_hits': 0, 'plan_misses': 0}
+
+    def warm_up(self):
+        """
+        Start all worker processes so the first requests do not pay for process start-up and imports.
+        Each worker loads the symbol modules in _init_worker
+        """
+        list(self._executor.map(_execute, [''] * self.jobs, [''] * self.jobs, [None] * self.jobs))
+
+    def run(self, script: str, input_text: str = '', cwd: Optional[str] = None) -> bytes:
+        try:
+            output, hit = self._executor.submit(_execute, script, input_text, cwd).result()
+        except Exception:
+            self._count('errors')
+            raise
+        finally:
+            self._count('requests')
+        self._count('plan_hits' if hit else 'plan_misses')
+        return output
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self._stats, jobs=self.jobs)
+
+    def _count(self, name: str):
+        with self._lock:
+            self._stats[name] += 1
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        if self.path == '/stats':
+            self._reply(200, json.dumps(self.server.scripts.stats()).encode('utf-8'), 'application/json')
+        else:
+            self._error(404, 'Unknown path ' + self.path)
+
+    def do_POST(self):
+        if self.path != '/run':
+            self._error(404, 'Unknown path ' + self.path)
+            return
+        length = int(self.headers.get('Content-Length') or 0)
+        if length > MAX_REQUEST_BYTES:
+            self._error(413, 'Request larger than {n} bytes'.format(n=MAX_REQUEST_BYTES))
+            return
+        try:
+            request = json.loads(self.rfile.read(length))
+            output = self.server.scripts.run(request['script'], request.get('input', ''), request.get('cwd'))
+        except Exception as e:
+            self._error(400, '{t}: {e}'.format(t=type(e).__name__, e=e))
+            return
+        self._reply(200, output, 'application/octet-stream')
+
+    def _error(self, status: int, message: str):
+        self._reply(status, json.dumps({'error': message}).encode('utf-8'), 'application/json')
+
+    def _reply(self, status: int, body: bytes, content_type: str):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        # The client may already be gone after reading the headers of an empty response
+        if body:
+            self.wfile.write(body)
+
+    def address_string(self) -> str:
+        # Unix domain socket peers have no address
+        return self.client_address[0] if self.client_address else 'unix'
+
+    def log_message(self, format: str, *args):
+        logger.debug(format, *args)
+
+
+class _UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def _terminate(signum, frame):
+    raise SystemExit(0)
+
+
+def serve(address: str, jobs: Optional[int] = None, cache_size: int = PLAN_CACHE_SIZE):
+    """
+    Serve POST /run ({"script", "input", "cwd"} -> output bytes) and GET /stats until interrupted.
+    address is "unix:<path>" or "<host>:<port>", see pyppeteer.client
+    """
+    host, port = parse_address(address)
+    scripts = ScriptServer(jobs, cache_size)
+    scripts.warm_up()
+    if port is None:
+        if os.path.exists(host):
+            os.remove(host)
+        server = _UnixHTTPServer(host, _Handler)
+    else:
+        server = ThreadingHTTPServer((host, port), _Handler)
+    server.scripts = scripts
+    # Clean up (e.g., the socket file) on SIGTERM as well
+    signal.signal(signal.SIGTERM, _terminate)
+    logger.info('serving on %s with %d workers', address, scripts.jobs)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        scripts.close()
+        if port is None and os.path.exists(host):
+            os.remove(host)
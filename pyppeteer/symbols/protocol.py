@@ -0,0 +1,251 @@
+import codecs
+from itertools import chain
+from typing import Callable, Iterable, Iterator, Mapping, Optional, Union
+
+from pyppeteer.mapped_text import MappedText
+
+# Default size of text chunks passed between chunked symbols
+CHUNK_SIZE = 1 << 16
+
+# A stream is either a whole text (str or lazy MappedText), whole binary data (bytes-like, UTF-8)
+# or an iterable of str or bytes chunks
+Binary = Union[bytes, bytearray, memoryview]
+Stream = Union[str, MappedText, Binary, Iterable[str], Iterable[bytes]]
+WHOLE_TYPES = (str, MappedText, bytes, bytearray, memoryview)
+BINARY_TYPES = (bytes, bytearray, memoryview)
+
+# Input kinds a symbol accepts, see accepts()
+TEXT = 'text'
+BYTES = 'bytes'
+BOTH = 'both'
+
+
+def chunked(func: Callable) -> Callable:
+    """
+    Mark a symbol as chunked: it is called with an iterator of str chunks instead of the whole input text
+    and returns a stream, usually a generator of chunks
+    """
+    func.chunked = True
+    return func
+
+
+def accepts(kind: str) -> Callable[[Callable], Callable]:
+    """
+    Declare which input a symbol works on: TEXT (default), BYTES or BOTH.
+    The input is only decoded / encoded when it does not match, so byte-oriented chains never decode their payload.
+    """
+    def decorator(func: Callable) -> Callable:
+        func.accepts = kind
+        return func
+    return decorator
+
+
+def mappable(func: Callable) -> Callable:
+    """
+    Mark a symbol reading its whole input as able to work on a memory-mapped input (MappedText or a memoryview of a
+    file) without loading it, e.g., by slicing it. Other symbols get a MappedText input as str, see call_symbol
+    and pyppeteer.memory_governor
+    """
+    func.mappable = True
+    return func
+
+
+def is_mappable(func: Callable) -> bool:
+    return getattr(func, 'mappable', False)
+
+
+def non_cacheable(func: Callable) -> Callable:
+    """
+    Exclude a symbol from result caching, e.g., because its output depends on external state
+    """
+    func.cache_key = None
+    return func
+
+
+def cache_key(key_func: Callable[[Mapping], object]) -> Callable[[Callable], Callable]:
+    """
+    Add key_func(named_args) to the result cache key of a symbol, e.g., mtime and size of a file it reads
+    """
+    def decorator(func: Callable) -> Callable:
+        func.cache_key = key_func
+        return func
+    return decorator
+
+
+def cache_key_of(func: Callable, named_args: Mapping) -> object:
+    """
+    Additional result cache key material of a symbol, False if the symbol must not be cached
+    """
+    if not hasattr(func, 'cache_key'):
+        return None
+    if func.cache_key is None:
+        return False
+    return func.cache_key(named_args)
+
+
+def prefetch(fetch_func: Callable[[Mapping], Optional[Stream]]) -> Callable[[Callable], Callable]:
+    """
+    Declare blocking I/O that an async engine may start as soon as the statement is parsed.
+    fetch_func(named_args) returns the complete output of the statement, or None to execute the symbol normally
+    """
+    def decorator(func: Callable) -> Callable:
+        func.prefetch = fetch_func
+        return func
+    return decorator
+
+
+def layer(make_node: Callable[[Stream, Mapping], object]) -> Callable[[Callable], Callable]:
+    """
+    Declare a symbol adding a video layer: make_node(output, named_args) returns a parser.ConcreteNode
+    (e.g., ShowTextNode) that FilterLayerGenerator collects for render(). The symbol itself should pass its input on,
+    so scripts run unchanged where nothing is rendered.
+    """
+    def decorator(func: Callable) -> Callable:
+        func.layer = make_node
+        return func
+    return decorator
+
+
+def layer_of(func: Callable) -> Optional[Callable[[Stream, Mapping], object]]:
+    return getattr(func, 'layer', None)
+
+
+def chunk_parallel(separator: str = '\n', merge: Optional[Callable[[list, Mapping], str]] = None,
+                   prepare: Optional[Callable[[str, Mapping], Mapping]] = None):
+    """
+    Declare that a symbol may run on independent pieces of its input split after separator (lines by default)
+    and the results be combined with merge(results, named_args) (concatenation by default).
+    prepare(prefix, named_args) may resolve input dependent arguments once from a prefix of the whole input,
+    all pieces then run with the returned arguments. See pyppeteer.data_parallel
+    """
+    def decorator(func: Callable) -> Callable:
+        func.chunk_parallel = (separator, merge, prepare)
+        return func
+    return decorator
+
+
+def is_chunk_parallel(func: Callable) -> bool:
+    return hasattr(func, 'chunk_parallel')
+
+
+def read_chunks(path: str, chunk_size: int = CHUNK_SIZE, binary: bool = False) -> Iterator[Union[str, bytes]]:
+    with open(path, 'rb' if binary else 'r') as file:
+        while chunk := file.read(chunk_size):
+            yield chunk
+
+
+def slice_chunks(chunks: Iterable[str], start: int = 0, stop: Optional[int] = None) -> Iterator[str]:
+    """
+    Characters [start:stop] of a chunk stream, stops consuming chunks once stop is reached
+    """
+    pos = 0
+    for chunk in chunks:
+        if stop is not None and pos >= stop:
+            break
+        end = pos + len(chunk)
+        if end > start:
+            yield chunk[max(0, start - pos):None if stop is None else stop - pos]
+        pos = end
+
+
+def slice_range(named_args: Mapping) -> tuple[int, Optional[int]]:
+    """
+    from/to arguments of Stream.select and of the symbols a select is pushed down into. Missing, empty and zero
+    bounds are open, i.e., (0, None). Raises ValueError for bounds that are not integers
+    """
+    start = int(named_args.get('from') or 0)
+    stop = int(named_args.get('to') or 0) or None
+    return start, stop
+
+
+def is_chunked(func: Callable) -> bool:
+    return getattr(func, 'chunked', False)
+
+
+def iter_chunks(stream: Stream, chunk_size: int = CHUNK_SIZE) -> Iterator[Union[str, Binary]]:
+    if isinstance(stream, str):
+        return (stream[i:i + chunk_size] for i in range(0, len(stream), chunk_size))
+    if isinstance(stream, MappedText):
+        return stream.iter_chunks(chunk_size)
+    if isinstance(stream, BINARY_TYPES):
+        # Slices of a memoryview do not copy
+        view = memoryview(stream)
+        return (view[i:i + chunk_size] for i in range(0, len(view), chunk_size))
+    return iter(stream)
+
+
+def decode_chunks(chunks: Iterable[Union[str, Binary]]) -> Iterator[str]:
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    for chunk in chunks:
+        chunk = chunk if isinstance(chunk, str) else decoder.decode(chunk)
+        if chunk:
+            yield chunk
+    rest = decoder.decode(b'', final=True)
+    if rest:
+        yield rest
+
+
+def encode_chunks(chunks: Iterable[Union[str, Binary]]) -> Iterator[Binary]:
+    for chunk in chunks:
+        yield chunk.encode('utf-8') if isinstance(chunk, str) else chunk
+
+
+def materialize(stream: Stream) -> Union[str, MappedText, Binary]:
+    """
+    Whole content of a stream, chunk iterators are joined while whole texts and binary data are passed on unchanged
+    """
+    if isinstance(stream, WHOLE_TYPES):
+        return stream
+    chunks = iter(stream)
+    first = next(chunks, None)
+    if first is None:
+        return ''
+    if isinstance(first, str):
+        return ''.join(chain((first,), chunks))
+    return b''.join(chain((first,), chunks))
+
+
+def to_text(stream: Union[str, MappedText, Binary]) -> Union[str, MappedText]:
+    if isinstance(stream, BINARY_TYPES):
+        return str(stream, 'utf-8')
+    return stream
+
+
+def to_bytes(stream: Union[str, MappedText, Binary]) -> Binary:
+    if isinstance(stream, str):
+        return stream.encode('utf-8')
+    if isinstance(stream, MappedText):
+        return stream.raw()
+    return stream
+
+
+def join_streams(streams: Iterable[Stream]) -> str:
+    """
+    Concatenation of several streams, the input of a statement reading more than one named stream
+    """
+    return ''.join(str(to_text(materialize(stream))) for stream in streams)
+
+
+def call_symbol(func: Callable, stream: Stream, named_args: Mapping) -> Stream:
+    kind = getattr(func, 'accepts', TEXT)
+    if is_chunked(func):
+        if kind == BYTES and isinstance(stream, MappedText):
+            # Slices of the mapping, the file is neither decoded nor encoded again
+            stream = stream.raw()
+        chunks = iter_chunks(stream)
+        if kind == TEXT:
+            chunks = decode_chunks(chunks)
+        elif kind == BYTES:
+            chunks = encode_chunks(chunks)
+        return func(chunks, named_args)
+
+    # Legacy symbols work on the whole input
+    stream = materialize(stream)
+    if kind == TEXT:
+        stream = to_text(stream)
+    elif kind == BYTES:
+        stream = to_bytes(stream)
+    if isinstance(stream, MappedText) and not is_mappable(func):
+        # Only symbols declared mappable handle the lazy view, all others get a str
+        stream = str(stream)
+    return func(stream, named_args)
@@ -1,7 +1,132 @@
-import pyppeteer.symbols.symbols_list
-import pyppeteer.symbols.symbols_stream
+import importlib
+import threading
+from collections import abc
+from types import ModuleType
+from typing import Callable, Iterator, Mapping, Optional, Union
 
-SYMBOLS = {
-    'MODULE_STREAM': pyppeteer.symbols.symbols_stream.SYMBOLS,
-    'MODULE_LIST': pyppeteer.symbols.symbols_list.SYMBOLS
+from pyppeteer.exceptions import GenerateSymbolAlreadyExists
+from pyppeteer.scanner import KEYWORDS
+
+# Built-in symbol modules, imported when a script first references them
+MODULES = {
+    'MODULE_STREAM': 'pyppeteer.symbols.symbols_stream',
+    'MODULE_LIST': 'pyppeteer.symbols.symbols_list',
+    'MODULE_STD': 'pyppeteer.symbols.symbols_std',
+    'MODULE_STAT': 'pyppeteer.symbols.symbols_stat',
+    'MODULE_ENC': 'pyppeteer.symbols.symbols_enc',
+    'MODULE_ENCR': 'pyppeteer.symbols.symbols_encr'
 }
+
+# Third-party packages register modules for the remaining script module names (e.g., NLP = "my_package.nlp"),
+# the entry point module defines SYMBOLS and optionally OPTIMIZER like the built-in ones
+ENTRY_POINT_GROUP = 'pyppeteer.symbols'
+
+
+def _entry_points() -> list:
+    from importlib.metadata import entry_points
+    try:
+        return list(entry_points(group=ENTRY_POINT_GROUP))
+    except TypeError:
+        # Python < 3.10
+        return list(entry_points().get(ENTRY_POINT_GROUP, ()))
+
+
+def _module_key(name: str) -> str:
+    # Script module names (Stream) and token type names (MODULE_STREAM) are both accepted
+    return KEYWORDS[name].name if name in KEYWORDS else name
+
+
+class SymbolRegistry:
+    """
+    Symbol modules by token type name (e.g., MODULE_STREAM). Modules are imported on first lookup,
+    entry points are only scanned when a name is not registered otherwise.
+    """
+
+    def __init__(self, modules: Optional[Mapping[str, Union[str, ModuleType]]] = None, entry_points: bool = True):
+        self._modules = {_module_key(k): v for k, v in (MODULES if modules is None else modules).items()}
+        self._methods: dict[str, dict[str, Callable]] = {}
+        self._optimizer: dict[str, Mapping] = {}
+        self._entry_points = entry_points
+        self._lock = threading.Lock()
+
+    def register(self, name: str, module: Union[str, ModuleType]):
+        """
+        :param name: Script module name or token type name
+        :param module: Module or its import path, defining SYMBOLS and optionally OPTIMIZER
+        """
+        key = _module_key(name)
+        if key in self._modules:
+            raise GenerateSymbolAlreadyExists('Module ' + name + ' is already registered')
+        self._modules[key] = module
+
+    def __contains__(self, name: str) -> bool:
+        self._load_entry_points(name)
+        return _module_key(name) in self._modules
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(list(self._modules))
+
+    def loaded(self) -> [str]:
+        return list(self._methods)
+
+    def methods(self, name: str) -> Optional[Mapping[str, Callable]]:
+        """
+        Methods of a module indexed by name, None if no such module is registered
+        """
+        key = _module_key(name)
+        methods = self._methods.get(key)
+        if methods is None and name in self:
+            with self._lock:
+                if key not in self._methods:
+                    module = self._modules[key]
+                    if isinstance(module, str):
+                        module = importlib.import_module(module)
+                    self._optimizer[key] = getattr(module, 'OPTIMIZER', {})
+                    self._methods[key] = dict(module.SYMBOLS)
+            methods = self._methods[key]
+        return methods
+
+    def optimizer(self, name: str) -> Mapping:
+        """
+        OPTIMIZER metadata of a module (see pyppeteer.optimizer), empty for unknown modules
+        """
+        if self.methods(name) is None:
+            return {}
+        return self._optimizer[_module_key(name)]
+
+    def _load_entry_points(self, name: str):
+        if not self._entry_points or _module_key(name) in self._modules:
+            return
+        self._entry_points = False
+        for entry_point in _entry_points():
+            key = _module_key(entry_point.name)
+            # Built-in modules are not replaced
+            if key not in self._modules:
+                self._modules[key] = entry_point.value.partition(':')[0]
+
+
+class _Table(abc.Mapping):
+    # Read-only view of one registry attribute, keeps the SYMBOLS[...] / OPTIMIZER[...] interface
+    def __init__(self, lookup: Callable[[str], Optional[Mapping]]):
+        self._lookup = lookup
+
+    def __getitem__(self, name: str) -> Mapping:
+        value = self._lookup(name)
+        if value is None:
+            raise KeyError(name)
+        return value
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(REGISTRY)
+
+    def __len__(self) -> int:
+        return len(list(REGISTRY))
+
+
+REGISTRY = SymbolRegistry()
+
+# Module name -> {method name: function}
+SYMBOLS = _Table(REGISTRY.methods)
+
+# Module name -> {method name: optimizer metadata}
+OPTIMIZER = _Table(REGISTRY.optimizer)
@@ -0,0 +1,163 @@
+import binascii
+from typing import Iterable, Iterator, Optional
+
+import numpy as np
+
+from pyppeteer.symbols.protocol import BYTES, accepts, chunked
+
+# ASCII whitespace is skipped when decoding, e.g., line breaks of wrapped base64
+_WHITESPACE = b' \t\n\v\f\r'
+_BASE64_ALPHABET = b'ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/='
+_HEX_ALPHABET = b'0123456789abcdefABCDEF'
+_TO_URLSAFE = bytes.maketrans(b'+/', b'-_')
+_FROM_URLSAFE = bytes.maketrans(b'-_', b'+/')
+
+# RFC 3986 unreserved characters are never escaped by Enc.url
+_UNRESERVED = b'ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-._~'
+_HEX_DIGITS = np.frombuffer(b'0123456789ABCDEF', dtype=np.uint8)
+# Value of a hex digit, 255 for other bytes
+_HEX_VALUES = np.full(256, 255, dtype=np.uint8)
+_HEX_VALUES[np.frombuffer(b'0123456789', dtype=np.uint8)] = np.arange(10)
+_HEX_VALUES[np.frombuffer(b'abcdef', dtype=np.uint8)] = np.arange(10, 16)
+_HEX_VALUES[np.frombuffer(b'ABCDEF', dtype=np.uint8)] = np.arange(10, 16)
+
+
+def _aligned(chunks: Iterable, size: int) -> Iterator:
+    # Pieces of chunks whose lengths are multiples of size, only the last one may be shorter.
+    # Chunks are sliced as memoryviews, only a group cut by a chunk border is copied
+    rest = b''
+    for chunk in chunks:
+        view = memoryview(chunk)
+        if rest:
+            fill = size - len(rest)
+            rest += view[:fill]
+            view = view[fill:]
+            if len(rest) < size:
+                continue
+            yield rest
+        cut = len(view) - len(view) % size
+        if cut:
+            yield view[:cut]
+        rest = bytes(view[cut:])
+    if rest:
+        yield rest
+
+
+def _cleaned(chunks: Iterable, alphabet: bytes, name: str, table: Optional[bytes] = None) -> Iterator[bytes]:
+    # Encoded input without whitespace, anything else outside the alphabet is an error
+    for chunk in chunks:
+        chunk = bytes(chunk).translate(table, _WHITESPACE)
+        if chunk.translate(None, alphabet):
+            raise ValueError('Enc.{n}: invalid character in encoded input'.format(n=name))
+        yield chunk
+
+
+@accepts(BYTES)
+@chunked
+def base64(chunks, named_args):
+    """
+    Base64 encode, or decode with decode="true"; urlsafe="true" uses the - and _ alphabet
+    """
+    urlsafe = named_args.get('urlsafe') == 'true'
+    if named_args.get('decode') == 'true':
+        cleaned = _cleaned(chunks, _BASE64_ALPHABET, 'base64', _FROM_URLSAFE if urlsafe else None)
+        for piece in _aligned(cleaned, 4):
+            yield binascii.a2b_base64(piece)
+        return
+    # Groups of 3 bytes encode independently, so each aligned piece is encoded on its own
+    for piece in _aligned(chunks, 3):
+        encoded = binascii.b2a_base64(piece, newline=False)
+        yield encoded.translate(_TO_URLSAFE) if urlsafe else encoded
+
+
+@accepts(BYTES)
+@chunked
+def _hex(chunks, named_args):
+    """
+    Hex encode (lower case), or decode with decode="true"
+    """
+    if named_args.get('decode') == 'true':
+        for piece in _aligned(_cleaned(chunks, _HEX_ALPHABET, 'hex'), 2):
+            yield binascii.a2b_hex(piece)
+        return
+    for chunk in chunks:
+        yield binascii.b2a_hex(chunk)
+
+
+def _url_escape(data: np.ndarray, escape: np.ndarray, plus: bool) -> bytes:
+    # Escaped bytes are repeated to fill their 3 output bytes, which are then overwritten with %XX
+    mask = np.take(escape, data)
+    if plus:
+        data = np.where(data == 32, np.uint8(43), data)
+    escaped = np.flatnonzero(mask)
+    if not len(escaped):
+        return data.tobytes()
+    out = np.repeat(data, np.where(mask, 3, 1))
+    positions = escaped + 2 * np.arange(len(escaped))
+    values = data[escaped]
+    out[positions] = 37
+    out[positions + 1] = np.take(_HEX_DIGITS, values >> 4)
+    out[positions + 2] = np.take(_HEX_DIGITS, values & 15)
+    return out.tobytes()
+
+
+def _url_unescape(data: np.ndarray) -> bytes:
+    # %XX with two hex digits is replaced by its byte, other percent signs are kept
+    percent = np.flatnonzero(data[:-2] == 37)
+    if not len(percent):
+        return data.tobytes()
+    high = np.take(_HEX_VALUES, data[percent + 1])
+    low = np.take(_HEX_VALUES, data[percent + 2])
+    valid = (high | low) < 16
+    percent = percent[valid]
+    data = data.copy()
+    data[percent] = (high[valid] << 4) | low[valid]
+    keep = np.ones(len(data), dtype=bool)
+    keep[percent + 1] = False
+    keep[percent + 2] = False
+    return data[keep].tobytes()
+
+
+@accepts(BYTES)
+@chunked
+def url(chunks, named_args):
+    """
+    Percent-encode all bytes except unreserved characters and those in safe=, or decode with decode="true".
+    plus="true" encodes spaces as + (form encoding)
+    """
+    plus = named_args.get('plus') == 'true'
+    if named_args.get('decode') == 'true':
+        rest = np.zeros(0, dtype=np.uint8)
+        for chunk in chunks:
+            data = np.frombuffer(chunk, dtype=np.uint8)
+            if len(rest):
+                data = np.concatenate((rest, data))
+            if plus:
+                data = np.where(data == 43, np.uint8(32), data)
+            # An escape cut by the chunk border is completed with the next chunk
+            start = max(len(data) - 2, 0)
+            tail = np.flatnonzero(data[start:] == 37)
+            cut = start + tail[0] if len(tail) else len(data)
+            rest = data[cut:]
+            yield _url_unescape(data[:cut])
+        if len(rest):
+            yield rest.tobytes()
+        return
+
+    escape = np.ones(256, dtype=bool)
+    escape[np.frombuffer(_UNRESERVED + (named_args.get('safe') or '').encode('utf-8'), dtype=np.uint8)] = False
+    if plus:
+        escape[32] = False
+    for chunk in chunks:
+        yield _url_escape(np.frombuffer(chunk, dtype=np.uint8), escape, plus)
+
+
+# Defined as _hex so the builtin is not shadowed
+SYMBOLS = [("base64", base64), ("hex", _hex), ("url", url)]
+
+# Optimizer metadata, see pyppeteer.optimizer
+OPTIMIZER = {
+    'base64': {'pure': True},
+    'hex': {'pure': True},
+    'url': {'pure': True}
+}
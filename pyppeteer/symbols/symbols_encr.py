@@ -0,0 +1,81 @@
+import binascii
+import hashlib
+import hmac
+import zlib
+
+from pyppeteer.symbols.protocol import BYTES, accepts, chunked
+
+DEFAULT_ALGORITHM = 'sha256'
+
+OUTPUTS = ('hex', 'base64', 'raw')
+
+
+class _Checksum:
+    """
+    hashlib-like interface of the zlib checksums
+    """
+
+    def __init__(self, func):
+        self._func = func
+        self._value = func(b'')
+
+    def update(self, data):
+        self._value = self._func(data, self._value)
+
+    def digest(self) -> bytes:
+        return self._value.to_bytes(4, 'big')
+
+    def hexdigest(self) -> str:
+        return '{v:08x}'.format(v=self._value)
+
+
+_CHECKSUMS = {'crc32': zlib.crc32, 'adler32': zlib.adler32}
+
+
+def _hasher(named_args):
+    algorithm = (named_args.get('algorithm') or DEFAULT_ALGORITHM).lower()
+    if algorithm in _CHECKSUMS:
+        if named_args.get('key'):
+            raise ValueError('Encr.hash: {a} cannot be keyed'.format(a=algorithm))
+        return _Checksum(_CHECKSUMS[algorithm])
+    if algorithm not in hashlib.algorithms_available:
+        raise ValueError('Encr.hash: unknown algorithm "{a}", expected one of {e}'.format(
+            a=algorithm, e=', '.join(sorted(hashlib.algorithms_available | _CHECKSUMS.keys()))))
+    if named_args.get('key'):
+        return hmac.new(named_args['key'].encode('utf-8'), digestmod=algorithm)
+    return hashlib.new(algorithm)
+
+
+@accepts(BYTES)
+@chunked
+def _hash(chunks, named_args):
+    """
+    Digest of the whole input: any hashlib algorithm, crc32 or adler32, HMAC with key=.
+    output="hex" (default), "base64" or "raw"; length= sets the digest size of shake_128 / shake_256
+    """
+    hasher = _hasher(named_args)
+    output = named_args.get('output') or 'hex'
+    if output not in OUTPUTS:
+        raise ValueError('Encr.hash: unknown output "{o}", expected one of {e}'.format(o=output, e=', '.join(OUTPUTS)))
+    # hashlib releases the GIL while it hashes a chunk, other statements keep running in the thread pool
+    for chunk in chunks:
+        hasher.update(chunk)
+    if getattr(hasher, 'name', '').startswith('shake'):
+        digest = hasher.digest(int(named_args.get('length') or 32))
+    else:
+        digest = hasher.digest()
+    if output == 'raw':
+        yield digest
+    elif output == 'base64':
+        yield binascii.b2a_base64(digest, newline=False)
+    else:
+        yield binascii.b2a_hex(digest)
+
+
+# Defined as _hash so the builtin is not shadowed
+SYMBOLS = [("hash", _hash)]
+
+# Optimizer metadata, see pyppeteer.optimizer
+OPTIMIZER = {
+    'hash': {'pure': True}
+}
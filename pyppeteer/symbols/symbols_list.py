@@ -1,6 +1,176 @@
-def convert(input_stream, named_args) -> str:
-    print("** List.convert() called on ", input_stream, " with ", named_args)
-    return input_stream
+import csv
+import io
+import json
+from itertools import chain
+from typing import Iterable, Iterator, Mapping, Optional
+
+from pyppeteer.symbols.protocol import CHUNK_SIZE, chunk_parallel, chunked
+
+# Separator detection only looks at this many leading characters of the input
+SAMPLE_SIZE = 1 << 16
+
+# Candidates for list_sep="auto", earlier ones win ties
+LIST_SEPARATORS = ('\t', ';', ',', '|')
+
+# Spellings for separators that are awkward to write in a script string
+_SEPARATOR_NAMES = {'\\t': '\t', 'tab': '\t', 'space': ' ', 'comma': ',', 'semicolon': ';', 'pipe': '|'}
+
+OUTPUTS = ('csv', 'tsv', 'json', 'jsonl')
+
+
+def _separator(value: str) -> str:
+    return _SEPARATOR_NAMES.get(value, value)
+
+
+def detect_separator(sample: str) -> Optional[str]:
+    """
+    Item separator of list-shaped text, or None if every line is a single item.
+    A candidate has to occur on nearly all lines of the sample, the one with the most consistent count wins.
+    """
+    lines = [line for line in sample.splitlines()[:-1] or sample.splitlines() if line]
+    best, best_score = None, 0.0
+    for candidate in LIST_SEPARATORS:
+        counts = [line.count(candidate) for line in lines]
+        hits = sum(1 for count in counts if count)
+        if not hits or hits < 0.9 * len(counts):
+            continue
+        # Share of lines that agree with the most common count
+        score = max(counts.count(count) for count in set(counts)) / len(counts)
+        if score > best_score:
+            best, best_score = candidate, score
+    return best
+
+
+def _peek(chunks: Iterable[str], size: int) -> tuple[str, Iterator[str]]:
+    # Leading text of at least size characters (if available) and the chunks with it put back
+    chunks = iter(chunks)
+    head = []
+    length = 0
+    for chunk in chunks:
+        head.append(chunk)
+        length += len(chunk)
+        if length >= size:
+            break
+    return ''.join(head), chain(head, chunks)
+
+
+def _line_batches(chunks: Iterable[str]) -> Iterator[list[str]]:
+    # Complete lines in batches of about one chunk, empty lines are dropped
+    pending = []
+    for chunk in chunks:
+        end = chunk.rfind('\n')
+        if end < 0:
+            pending.append(chunk)
+            continue
+        pending.append(chunk[:end])
+        lines = ''.join(pending).splitlines()
+        pending = [chunk[end + 1:]]
+        yield [line for line in lines if line]
+    lines = ''.join(pending).splitlines()
+    if lines:
+        yield [line for line in lines if line]
+
+
+def _split(lines: list[str], list_sep: Optional[str]) -> list:
+    # Items are plain strings (flat list) or lists of fields
+    if list_sep is None:
+        return lines
+    return [line.split(list_sep) for line in lines]
+
+
+def _write_csv(batches: Iterable[list[str]], list_sep: Optional[str], delimiter: str) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, delimiter=delimiter, lineterminator='\n')
+    for lines in batches:
+        block = '\n'.join(lines)
+        if '"' not in block and '\r' not in block and (delimiter == list_sep or delimiter not in block):
+            # Nothing needs quoting, the separators are replaced in one pass over the batch
+            buffer.write(block.replace(list_sep, delimiter) if list_sep else block)
+            buffer.write('\n')
+        elif list_sep is None:
+            # Single items are wrapped into one field rows, a bare str would be written as one field per character
+            writer.writerows(zip(lines))
+        else:
+            writer.writerows(_split(lines, list_sep))
+        if buffer.tell() >= CHUNK_SIZE:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def _write_json(batches: Iterable[list[str]], list_sep: Optional[str]) -> Iterator[str]:
+    # One encoder call per batch, the surrounding brackets are shared by all batches
+    yield '['
+    first = True
+    for lines in batches:
+        if not lines:
+            continue
+        body = json.dumps(_split(lines, list_sep), ensure_ascii=False)[1:-1]
+        yield body if first else ', ' + body
+        first = False
+    yield ']'
+
+
+def _write_jsonl(batches: Iterable[list[str]], list_sep: Optional[str]) -> Iterator[str]:
+    encode = json.JSONEncoder(ensure_ascii=False).encode
+    for lines in batches:
+        if not lines:
+            continue
+        if list_sep is None:
+            # Quotes inside strings are escaped, so '", "' only occurs between the items of the encoded batch
+            yield encode(lines)[1:-1].replace('", "', '"\n"') + '\n'
+        else:
+            yield '\n'.join(map(encode, _split(lines, list_sep))) + '\n'
+
+
+def _resolve(sample: str, named_args: Mapping) -> Mapping:
+    # Fix list_sep="auto" once for the whole input, so that all pieces of a data-parallel run agree
+    if named_args.get('list_sep', 'auto') != 'auto':
+        return named_args
+    list_sep = detect_separator(sample)
+    return dict(named_args, list_sep='' if list_sep is None else list_sep)
+
+
+def _merge(results: list, named_args: Mapping) -> str:
+    if named_args.get('output', 'csv') == 'json':
+        bodies = [result[1:-1] for result in results if result != '[]']
+        return '[' + ', '.join(bodies) + ']'
+    return ''.join(results)
+
+
+@chunk_parallel(separator='\n', merge=_merge, prepare=_resolve)
+@chunked
+def convert(chunks, named_args):
+    """
+    Convert list-shaped text to csv, tsv, json or jsonl.
+    Lines are rows, list_sep splits a line into items ("auto" detects it from a prefix of the input,
+    an empty value keeps every line a single item). sep is the field delimiter of csv output.
+    """
+    output = named_args.get('output', 'csv')
+    if output not in OUTPUTS:
+        raise ValueError('List.convert: unknown output "{o}", expected one of {e}'.format(
+            o=output, e=', '.join(OUTPUTS)))
+
+    list_sep = _separator(named_args.get('list_sep', 'auto'))
+    if list_sep == 'auto':
+        sample, chunks = _peek(chunks, SAMPLE_SIZE)
+        list_sep = detect_separator(sample)
+    list_sep = list_sep or None
+    batches = _line_batches(chunks)
+
+    if output == 'json':
+        return _write_json(batches, list_sep)
+    if output == 'jsonl':
+        return _write_jsonl(batches, list_sep)
+    delimiter = '\t' if output == 'tsv' else _separator(named_args.get('sep', ','))
+    return _write_csv(batches, list_sep, delimiter)
 
 
 SYMBOLS = [("convert", convert)]
+
+# Optimizer metadata, see pyppeteer.optimizer
+OPTIMIZER = {
+    'convert': {'pure': True}
+}
@@ -0,0 +1,221 @@
+import codecs
+from collections import Counter
+from typing import Iterable, Iterator
+
+import numpy as np
+
+from pyppeteer.symbols.protocol import BYTES, accepts, chunked
+
+# Chunks are joined into blocks of about this many bytes, so NumPy calls are few and large
+BLOCK_SIZE = 1 << 22
+
+
+UNITS = ('line', 'word')
+
+
+def _blocks(chunks: Iterable) -> Iterator[np.ndarray]:
+    pending = []
+    size = 0
+    for chunk in chunks:
+        pending.append(chunk)
+        size += len(chunk)
+        if size >= BLOCK_SIZE:
+            yield np.frombuffer(b''.join(pending), dtype=np.uint8)
+            pending = []
+            size = 0
+    if size:
+        yield np.frombuffer(b''.join(pending), dtype=np.uint8)
+
+
+def _table(rows: Iterable[tuple]) -> str:
+    # Tab separated key/value lines, e.g., for List.convert(output="json")
+    return ''.join('{k}\t{v}\n'.format(k=key, v=value) for key, value in rows)
+
+
+def _label(codepoint: int) -> str:
+    # Control characters and whitespace are escaped so every item stays on its line and is visible
+    if codepoint == 0x20:
+        return '\\x20'
+    return repr(chr(codepoint))[1:-1] if codepoint < 0x20 or codepoint == 0x7f else chr(codepoint)
+
+
+def _add(total: np.ndarray, counts: np.ndarray) -> np.ndarray:
+    if len(counts) > len(total):
+        counts = counts.copy()
+        counts[:len(total)] += total
+        return counts
+    total[:len(counts)] += counts
+    return total
+
+
+def _words(data: np.ndarray) -> np.ndarray:
+    # True for bytes of words, ASCII whitespace (\t \n \v \f \r and space) separates them.
+    # Comparisons are much faster than a lookup table; 9..13 is tested with one unsigned wrapping subtraction
+    return (data != 32) & ((data - np.uint8(9)) > 4)
+
+
+def _char_lengths(data: np.ndarray, starts: np.ndarray, ends: np.ndarray) -> np.ndarray:
+    # Characters in data[start:end], UTF-8 continuation bytes do not start one
+    if not len(starts) or data.max() < 0x80:
+        return ends - starts
+    prefix = np.zeros(len(data) + 1, dtype=np.int64)
+    np.cumsum((data & 0xc0) != 0x80, out=prefix[1:])
+    return prefix[ends] - prefix[starts]
+
+
+def _line_lengths(data: np.ndarray, final: bool) -> tuple[np.ndarray, np.ndarray]:
+    # Lengths in characters of the complete lines in data (without line feed) and the incomplete rest
+    ends = np.flatnonzero(data == 10)
+    tail = ends[-1] + 1 if len(ends) else 0
+    if final and tail < len(data):
+        ends = np.append(ends, len(data))
+        tail = len(data)
+    starts = np.zeros_like(ends)
+    starts[1:] = ends[:-1] + 1
+    return _char_lengths(data, starts, ends), data[tail:]
+
+
+def _word_lengths(data: np.ndarray, final: bool) -> tuple[np.ndarray, np.ndarray]:
+    # Lengths in characters of the complete words in data and the incomplete rest
+    word = _words(data)
+    edges = np.diff(word.view(np.int8), prepend=0, append=0)
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+    tail = len(data)
+    if not final and len(starts) and word[-1]:
+        tail = starts[-1]
+        starts, ends = starts[:-1], ends[:-1]
+    return _char_lengths(data, starts, ends), data[tail:]
+
+
+def length_counts(chunks: Iterable, unit: str) -> np.ndarray:
+    """
+    counts[n] = number of lines / words of n characters, in one pass over the chunks
+    """
+    if unit not in UNITS:
+        raise ValueError('Stat: unknown unit "{u}", expected one of {e}'.format(u=unit, e=', '.join(UNITS)))
+    split = _line_lengths if unit == 'line' else _word_lengths
+    counts = np.zeros(1, dtype=np.int64)
+    rest = np.zeros(0, dtype=np.uint8)
+    for block in _blocks(chunks):
+        # Only the unfinished line / word is carried over to the next block
+        lengths, rest = split(np.concatenate((rest, block)) if len(rest) else block, False)
+        counts = _add(counts, np.bincount(lengths))
+    if len(rest):
+        lengths, _ = split(rest, True)
+        counts = _add(counts, np.bincount(lengths))
+    return counts
+
+
+@accepts(BYTES)
+@chunked
+def count(chunks, named_args):
+    """
+    Number of bytes, characters, words and lines
+    """
+    size = chars = words = lines = 0
+    in_word = False
+    last = None
+    for block in _blocks(chunks):
+        size += len(block)
+        chars += len(block) - int(np.count_nonzero((block & 0xc0) == 0x80))
+        lines += int(np.count_nonzero(block == 10))
+        word = _words(block)
+        # Words are counted at their first byte, a word may continue from the previous block
+        words += int(np.count_nonzero(word[1:] > word[:-1])) + int(word[0] and not in_word)
+        in_word = bool(word[-1])
+        last = block[-1]
+    lines += int(last is not None and last != 10)
+    yield _table((('bytes', size), ('chars', chars), ('words', words), ('lines', lines)))
+
+
+def _top_counts(chunks: Iterable, unit: str) -> tuple[np.ndarray, list]:
+    # Counts indexed by byte value / codepoint, labels are produced for the selected indices only
+    if unit == 'byte':
+        counts = np.zeros(256, dtype=np.int64)
+        for block in _blocks(chunks):
+            counts += np.bincount(block, minlength=256)
+        return counts, [_label(b) if b < 0x80 else '\\x{b:02x}'.format(b=b) for b in range(256)]
+
+    counts = np.zeros(0x80, dtype=np.int64)
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    for block in _blocks(chunks):
+        # Characters cut by the block border are completed by the incremental decoder
+        codepoints = np.frombuffer(decoder.decode(memoryview(block)).encode('utf-32-le'), dtype='<u4')
+        counts = _add(counts, np.bincount(codepoints))
+    decoder.decode(b'', final=True)
+    return counts, None
+
+
+@accepts(BYTES)
+@chunked
+def top(chunks, named_args):
+    """
+    The k most frequent bytes, characters or words with their counts
+    """
+    k = int(named_args.get('k') or 10)
+    unit = named_args.get('unit') or 'char'
+    if unit == 'word':
+        # Counter.update counts in C, words have no dense index for bincount
+        words = Counter()
+        decoder = codecs.getincrementaldecoder('utf-8')()
+        rest = ''
+        for block in _blocks(chunks):
+            text = rest + decoder.decode(memoryview(block))
+            parts = text.split()
+            # The last word may continue in the next block
+            rest = parts.pop() if parts and not text[-1].isspace() else ''
+            words.update(parts)
+        words.update(rest.split())
+        yield _table(words.most_common(k))
+        return
+    if unit not in ('byte', 'char'):
+        raise ValueError('Stat.top: unknown unit "{u}", expected byte, char or word'.format(u=unit))
+
+    counts, labels = _top_counts(chunks, unit)
+    index = np.flatnonzero(counts)
+    if len(index) > k:
+        index = index[np.argpartition(-counts[index], k - 1)[:k]]
+    # Most frequent first, ties in code order
+    index = index[np.lexsort((index, -counts[index]))]
+    yield _table((labels[i] if labels else _label(int(i)), int(counts[i])) for i in index)
+
+
+@accepts(BYTES)
+@chunked
+def histogram(chunks, named_args):
+    """
+    Line or word lengths (in characters) in equal width bins from 0 to the maximum length
+    """
+    counts = length_counts(chunks, named_args.get('unit') or 'line')
+    bins = int(named_args.get('bins') or 10)
+    edges = np.unique(np.linspace(0, len(counts), bins + 1).astype(np.int64))
+    sums = np.add.reduceat(counts, edges[:-1])
+    yield _table(('{lo}-{hi}'.format(lo=lo, hi=hi - 1), int(n)) for lo, hi, n in zip(edges[:-1], edges[1:], sums))
+
+
+@accepts(BYTES)
+@chunked
+def percentiles(chunks, named_args):
+    """
+    Nearest-rank percentiles of line or word lengths (in characters)
+    """
+    counts = length_counts(chunks, named_args.get('unit') or 'line')
+    cumulative = np.cumsum(counts)
+    total = int(cumulative[-1])
+    rows = []
+    for p in (named_args.get('p') or '50,90,99').split(','):
+        rank = max(1, int(np.ceil(float(p) / 100 * total)))
+        rows.append(('p' + p.strip(), int(np.searchsorted(cumulative, rank)) if total else 0))
+    yield _table(rows)
+
+
+SYMBOLS = [("count", count), ("top", top), ("histogram", histogram), ("percentiles", percentiles)]
+
+# Optimizer metadata, see pyppeteer.optimizer
+OPTIMIZER = {
+    'count': {'pure': True},
+    'top': {'pure': True},
+    'histogram': {'pure': True},
+    'percentiles': {'pure': True}
+}
@@ -0,0 +1,55 @@
+from pyppeteer.parser import DEFAULT_LAYER_SECONDS, DEFAULT_TEXT_SIZE, ShowImageNode, ShowTextNode
+from pyppeteer.symbols.protocol import BOTH, accepts, layer, mappable, materialize, to_text
+
+
+def _float(named_args, key):
+    return float(named_args[key]) if named_args.get(key) else None
+
+
+def _int(named_args, key):
+    return int(named_args[key]) if named_args.get(key) else None
+
+
+def _color(value: str) -> tuple:
+    # "#rrggbb" or "r,g,b"
+    if value.startswith('#'):
+        return tuple(int(value[i:i + 2], 16) for i in (1, 3, 5))
+    return tuple(int(c) for c in value.split(','))
+
+
+def _text_layer(stream, named_args) -> ShowTextNode:
+    # Without text= the current stream is shown, e.g., a line of dialogue produced by the script
+    text = named_args.get('text') or str(to_text(materialize(stream)))
+    return ShowTextNode(text, start=_float(named_args, 'start'),
+                        duration=_float(named_args, 'seconds') or DEFAULT_LAYER_SECONDS,
+                        x=_int(named_args, 'x'), y=_int(named_args, 'y'),
+                        size=_int(named_args, 'size') or DEFAULT_TEXT_SIZE,
+                        color=_color(named_args.get('color') or '255,255,255'))
+
+
+def _image_layer(stream, named_args) -> ShowImageNode:
+    return ShowImageNode(named_args['file'], start=_float(named_args, 'start'),
+                         duration=_float(named_args, 'seconds') or DEFAULT_LAYER_SECONDS,
+                         x=_int(named_args, 'x'), y=_int(named_args, 'y'),
+                         width=_int(named_args, 'width'), height=_int(named_args, 'height'))
+
+
+@layer(_text_layer)
+@accepts(BOTH)
+def show_text(input_stream, named_args):
+    # Adds a text layer to the video, the stream is passed on unchanged
+    return input_stream
+
+
+@layer(_image_layer)
+@mappable
+@accepts(BOTH)
+def show_image(input_stream, named_args):
+    # Adds an image layer to the video, the stream is passed on unchanged
+    return input_stream
+
+
+SYMBOLS = [("show_text", show_text), ("show_image", show_image)]
+
+# Optimizer metadata, see pyppeteer.optimizer. Layers are side effects, so neither symbol is pure
+OPTIMIZER = {}
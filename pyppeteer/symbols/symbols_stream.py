@@ -1,39 +1,69 @@
-def load(input_stream, named_args) -> str:
-    print("** Stream.load() called on ", input_stream, " with ", named_args)
+import os
 
+from pyppeteer.mapped_text import MappedText
+from pyppeteer.symbols.protocol import BOTH, accepts, cache_key, chunked, mappable, materialize, prefetch, \
+    read_chunks, slice_chunks, slice_range
+
+
+def _file_state(named_args):
+    if named_args.get('file'):
+        stat = os.stat(named_args['file'])
+        return stat.st_mtime_ns, stat.st_size
+    return None
+
+
+def _fetch_file(named_args):
+    if named_args.get('raw') or not named_args.get('file') or named_args.get('lazy') == 'true':
+        return None
+    start, stop = slice_range(named_args)
+    binary = named_args.get('binary') == 'true'
+    return materialize(slice_chunks(read_chunks(named_args['file'], binary=binary), start, stop))
+
+
+@cache_key(_file_state)
+@prefetch(_fetch_file)
+@accepts(BOTH)
+@chunked
+def load(chunks, named_args):
+    # from/to restrict the loaded text to a character range, usually pushed down from Stream.select by the optimizer
+    # binary="true" loads undecoded UTF-8 bytes, from/to are byte offsets then
+    start, stop = slice_range(named_args)
+    binary = named_args.get('binary') == 'true'
     if named_args.get('raw'):
-        return named_args['raw']
+        raw = named_args['raw'].encode('utf-8') if binary else named_args['raw']
+        return raw[start:stop]
     else:
         if named_args.get('file'):
-            with open(named_args['file'], 'r') as file:
-                return file.read()
+            if named_args.get('lazy') == 'true':
+                # Memory-mapped view, Stream.select slices it without reading the whole file
+                mapped = MappedText.open(named_args['file'])
+                return mapped.raw()[start:stop] if binary else mapped[start:stop]
+            if start or stop is not None:
+                return slice_chunks(read_chunks(named_args['file'], binary=binary), start, stop)
+            return read_chunks(named_args['file'], binary=binary)
 
-    return input_stream
+    if start or stop is not None:
+        return slice_chunks(chunks, start, stop)
+    return chunks
 
 
+@mappable
+@accepts(BOTH)
 def select(input_stream, named_args) -> str:
-    print("** Stream.select() called on ", input_stream, " with ", named_args)
-
+    # Character offsets on text, byte offsets on binary streams
     if input_stream:
-        if named_args.get('from'):
-            from_statement = int(named_args['from'])
-        else:
-            from_statement = None
-
-        if named_args.get('to'):
-            to_statement = int(named_args['to'])
-        else:
-            to_statement = None
-
-        if from_statement and to_statement:
-            return input_stream[from_statement:to_statement]
-        elif from_statement and not to_statement:
-            return input_stream[from_statement:]
-        elif to_statement and not from_statement:
-            return input_stream[:to_statement]
-        else:
-            return input_stream
+        start, stop = slice_range(named_args)
+        if start or stop is not None:
+            return input_stream[start:stop]
+        return input_stream
 
 
 SYMBOLS = [("load", load),
            ("select", select)]
+
+# Optimizer metadata, see pyppeteer.optimizer
+OPTIMIZER = {
+    'load': {'pure': True, 'source': lambda named_args: bool(named_args.get('raw') or named_args.get('file')),
+             'accepts_range': True},
+    'select': {'pure': True, 'slice': True}
+}
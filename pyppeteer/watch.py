@@ -0,0 +1,173 @@
+import logging
+import os
+import time
+from collections import deque
+from typing import Callable, Iterator
+
+from pyppeteer.generator import FilterLayerGenerator
+from pyppeteer.mapped_text import MappedText
+from pyppeteer.memory_governor import stream_bytes
+from pyppeteer.parser import Parser, StatementNode
+from pyppeteer.symbols.protocol import Stream, cache_key_of, materialize
+
+logger = logging.getLogger(__name__)
+
+# Default upper bound for all retained intermediate streams
+DEFAULT_SNAPSHOT_BYTES = 256 * 1024 * 1024
+
+
+def _snapshot_streams(snapshot: tuple) -> Iterator:
+    _, in_stream, streams, _ = snapshot
+    yield in_stream
+    yield from streams.values()
+
+
+def _stream_bytes(stream) -> int:
+    # Memory-mapped files live in the page cache, not in the snapshot
+    if isinstance(stream, MappedText):
+        return 0
+    return stream_bytes(stream)
+
+
+class IncrementalRunner:
+    """
+    Re-runs a script after edits, starting from the first statement that changed.
+    The state after every executed statement is kept as a snapshot of its streams, as long as all snapshots fit
+    into max_snapshot_bytes; the oldest snapshots are dropped first. Streams are shared between snapshots when
+    a statement does not change them and are only counted once.
+    """
+
+    def __init__(self, max_snapshot_bytes: int = DEFAULT_SNAPSHOT_BYTES,
+                 generator_factory: Callable[[], FilterLayerGenerator] = FilterLayerGenerator):
+        self.max_snapshot_bytes = max_snapshot_bytes
+        self._generator_factory = generator_factory
+        self._parser = Parser()
+        self._generator = generator_factory()
+        # Parsed statements of each distinct line of the last script
+        self._lines: dict[str, tuple[StatementNode, ...]] = {}
+        self._keys: list = []
+        # _snapshots[i] is the state after statement i - 1, _snapshots[0] the initial state
+        self._snapshots: dict[int, tuple] = {}
+        # Indices of the evictable snapshots, oldest first
+        self._order: deque[int] = deque()
+        # id -> [stream, number of references from snapshots], each stream is counted once in _bytes
+        self._refs: dict[int, list] = {}
+        self._bytes = 0
+        self.last_resumed = 0
+        self.last_executed = 0
+
+    def parse(self, script: str) -> [StatementNode]:
+        """
+        Parse script, only lines that were not part of the previous script are tokenized again.
+        Falls back to a full parse if a line is not a complete statement on its own.
+        """
+        lines = {}
+        statements = []
+        for line in script.splitlines():
+            parsed = self._lines.get(line)
+            if parsed is None:
+                try:
+                    parsed = tuple(self._parser.parse(line))
+                except Exception:
+                    # A statement spanning several lines, or a syntax error reported by the full parse
+                    self._lines = {}
+                    return self._parser.parse(script)
+            lines[line] = parsed
+            statements.extend(parsed)
+        self._lines = lines
+        return statements
+
+    def update(self, script: str, input_stream: Stream = '') -> Stream:
+        """
+        Execute an edited version of the script
+        :return: Output stream of the script, materialized
+        """
+        statements = self.parse(script)
+        keys = [self._key(statement) for statement in statements]
+
+        common = 0
+        while common < min(len(keys), len(self._keys)) and keys[common] == self._keys[common]:
+            common += 1
+        resume = max((i for i in self._snapshots if i <= common), default=None)
+        if resume is None or self._snapshots[0][1] != input_stream:
+            resume = 0
+            for index in list(self._snapshots):
+                self._remove(index)
+        # Snapshots past the resumption point belong to the old script
+        for index in [i for i in self._snapshots if i > resume]:
+            self._remove(index)
+        self._order = deque(i for i in self._order if i in self._snapshots)
+        self._keys = keys
+
+        generator = self._generator
+        if resume:
+            generator.restore(self._snapshots[resume])
+        else:
+            generator = self._generator = self._generator_factory()
+            generator.restore((0, input_stream, {}, ()))
+            self._add(0, generator.snapshot())
+
+        logger.debug('resuming at statement %d of %d', resume, len(statements))
+        for index in range(resume, len(statements)):
+            generator.generate(statements[index])
+            self._add(index + 1, generator.snapshot())
+            self._evict()
+        self.last_resumed = resume
+        self.last_executed = len(statements) - resume
+        return materialize(generator.snapshot()[1])
+
+    def snapshot_bytes(self) -> int:
+        return self._bytes
+
+    def _add(self, index: int, snapshot: tuple):
+        self._snapshots[index] = snapshot
+        if index:
+            self._order.append(index)
+        for stream in _snapshot_streams(snapshot):
+            entry = self._refs.get(id(stream))
+            if entry is None:
+                self._refs[id(stream)] = [stream, 1]
+                self._bytes += _stream_bytes(stream)
+            else:
+                entry[1] += 1
+
+    def _remove(self, index: int):
+        for stream in _snapshot_streams(self._snapshots.pop(index)):
+            entry = self._refs[id(stream)]
+            entry[1] -= 1
+            if not entry[1]:
+                del self._refs[id(stream)]
+                self._bytes -= _stream_bytes(stream)
+
+    def _evict(self):
+        # The initial state is always kept, it is needed to start over
+        while self._bytes > self.max_snapshot_bytes and self._order:
+            self._remove(self._order.popleft())
+
+    def _key(self, statement: StatementNode):
+        # Statements are equal if they print the same, symbols reading files also compare the file state
+        node = statement.node
+        step = self._generator._resolve(node)
+        extra = cache_key_of(*step) if step else None
+        if extra is False:
+            # Output depends on external state, never reuse it
+            extra = object()
+        return str(node), extra
+
+
+def watch(path: str, on_change: Callable[[str], None], interval: float = 0.5, stop: Callable[[], bool] = None):
+    """
+    Poll path and call on_change(text) with its content whenever its modification time or size changes
+    """
+    last = None
+    while not (stop and stop()):
+        try:
+            stat = os.stat(path)
+            state = (stat.st_mtime_ns, stat.st_size)
+        except FileNotFoundError:
+            state = None
+        if state is not None and state != last:
+            last = state
+            with open(path, 'r') as file:
+                on_change(file.read())
+        time.sleep(interval)
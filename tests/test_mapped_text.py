@@ -0,0 +1,46 @@
+import pytest
+
+from pyppeteer.mapped_text import BLOCK_SIZE, MappedText
+from pyppeteer.symbols.protocol import iter_chunks
+
+# Multi-byte characters of every UTF-8 length, spanning several index blocks
+TEXT = ('ascii line\n' + 'héllo € \U0001f600\n') * (3 * BLOCK_SIZE // 20)
+
+
+@pytest.fixture
+def mapped(tmp_path):
+    path = tmp_path / 'text.txt'
+    path.write_bytes(TEXT.encode('utf-8'))
+    return MappedText.open(str(path))
+
+
+SLICES = [(None, None), (0, 0), (0, 1), (5, 25), (1000, None), (None, 70000), (BLOCK_SIZE - 3, BLOCK_SIZE + 3),
+          (-10, None), (None, -5), (-100, -50), (50, 10), (0, len(TEXT) + 10), (len(TEXT) + 5, None)]
+
+
+@pytest.mark.parametrize('start, stop', SLICES)
+def test_slices_match_str(mapped, start, stop):
+    view = mapped[start:stop]
+    expected = TEXT[start:stop]
+    assert str(view) == expected
+    assert len(view) == len(expected)
+    assert bool(view) == bool(expected)
+    assert bytes(view.raw()) == expected.encode('utf-8')
+    assert view.nbytes == len(expected.encode('utf-8'))
+    assert ''.join(iter_chunks(view)) == expected
+
+
+@pytest.mark.parametrize('outer, inner', [((10, 5000), (3, 20)), ((100, None), (None, 7)), ((70000, None), (5, 100)),
+                                          ((10, 50), (0, 100))])
+def test_nested_slices_match_str(mapped, outer, inner):
+    assert str(mapped[outer[0]:outer[1]][inner[0]:inner[1]]) == TEXT[outer[0]:outer[1]][inner[0]:inner[1]]
+
+
+@pytest.mark.parametrize('index', [0, 12, 17, BLOCK_SIZE + 1, -1, -3])
+def test_indexing_matches_str(mapped, index):
+    assert mapped[index] == TEXT[index]
+
+
+def test_index_out_of_range(mapped):
+    with pytest.raises(IndexError):
+        mapped[len(TEXT)]
@@ -0,0 +1,42 @@
+import pytest
+
+from pyppeteer.optimizer import Optimizer
+from pyppeteer.parser import Parser
+from tests.util import run_script
+
+TEXT = 'héllo wörld \U0001f600 and more text\n' * 50
+
+
+@pytest.fixture
+def text_file(tmp_path):
+    path = tmp_path / 'input.txt'
+    path.write_bytes(TEXT.encode('utf-8'))
+    return str(path).replace('\\', '/')
+
+
+SCRIPTS = [
+    'Stream.load(raw="abcdef")\nStream.select(from="2")\nStream.select(to="0")\n',
+    'Stream.load(raw="abcdef")\nStream.select(to="0")\n',
+    'Stream.load(raw="abcdef")\nStream.select(from="0",to="0")\n',
+    'Stream.load(raw="abcdef",to="0")\n',
+    'Stream.load(raw="abcdef")\nStream.select(from="1",to="5")\nStream.select(from="1",to="3")\n',
+    'Stream.load(raw="abcdef")\nStream.select(from="1")\nStream.select(to="10")\n',
+    'Stream.load(raw="abcdef")\nStream.select(from="-3")\n',
+    'Stream.load(raw="unused")\nStream.load(raw="héllo wörld")\nStream.select(from="2",to="8")\n',
+    'Stream.load(raw="héllo wörld",binary="true")\nStream.select(from="2",to="8")\n',
+    'Stream.load(file="{f}")\nStream.select(from="3")\nStream.select(from="2",to="40")\n',
+    'Stream.load(file="{f}",lazy="true")\nStream.select(from="100",to="0")\nStream.select(to="7")\n',
+    'Stream.load(file="{f}",binary="true")\nStream.select(from="1",to="9")\nStream.select(from="2")\n',
+]
+
+
+@pytest.mark.parametrize('script', SCRIPTS)
+def test_optimized_output_matches_unoptimized(script, text_file):
+    script = script.replace('{f}', text_file)
+    assert run_script(script, optimize=True) == run_script(script)
+
+
+def test_zero_bound_is_not_pushed_down():
+    statements = Parser().parse('Stream.load(raw="abcdef")\nStream.select(from="2")\nStream.select(to="0")\n')
+    optimized = Optimizer().optimize(statements)
+    assert [str(s.node) for s in optimized] == ['Stream.load(raw="abcdef",from="2")']
@@ -0,0 +1,43 @@
+import pytest
+
+from pyppeteer.result_cache import ResultCache
+from tests.util import run_script
+
+SCRIPTS = [
+    'Stream.load(raw="éabc",binary="true")\nStream.select(from="1")\n',
+    'Stream.load(raw="éabc")\nStream.select(from="1")\n',
+    'Stream.load(raw="éabc",binary="true")\nEnc.hex()\n',
+    'Stream.load(raw="éabc")\nEnc.hex()\n',
+    'Stream.load(raw="éabc")\nEnc.base64()\nEnc.base64(decode="true")\nStream.select(to="2")\n',
+    'Stream.load(raw="éabc")\nEncr.hash()\n',
+    'Stream.load(file="{f}",lazy="true")\nStream.select(from="2",to="30")\n',
+    'Stream.load(file="{f}",binary="true")\nStream.select(from="2",to="30")\n',
+]
+
+
+@pytest.fixture
+def scripts(tmp_path):
+    path = tmp_path / 'input.txt'
+    path.write_bytes(('wörld \U0001f600 ' * 20).encode('utf-8'))
+    return [script.replace('{f}', str(path).replace('\\', '/')) for script in SCRIPTS]
+
+
+def test_memoized_output_matches_uncached(scripts, tmp_path):
+    expected = [run_script(script) for script in scripts]
+    directory = str(tmp_path / 'memo')
+    cache = ResultCache(directory=directory)
+    # The second pass is served from the memory tier, a new cache on the same directory reads the disk tier
+    disk = ResultCache(directory=directory)
+    for result_cache in (cache, cache, disk):
+        assert [run_script(script, result_cache=result_cache) for script in scripts] == expected
+    assert cache.memory_hits
+    assert disk.disk_hits
+
+
+def test_text_and_binary_inputs_have_different_keys(tmp_path):
+    cache = ResultCache(directory=str(tmp_path))
+    binary = run_script('Stream.load(raw="éabc",binary="true")\nStream.select(from="1")\n', result_cache=cache)
+    text = run_script('Stream.load(raw="éabc")\nStream.select(from="1")\n',
+                      result_cache=ResultCache(directory=str(tmp_path)))
+    assert binary == b'\xa9abc'
+    assert text == b'abc'
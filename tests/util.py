@@ -0,0 +1,20 @@
+from typing import Optional
+
+from pyppeteer.generator import FilterLayerGenerator
+from pyppeteer.optimizer import Optimizer
+from pyppeteer.parser import Parser
+from pyppeteer.result_cache import ResultCache
+from pyppeteer.symbols.protocol import encode_chunks
+
+
+def run_script(script: str, optimize: bool = False, result_cache: Optional[ResultCache] = None) -> bytes:
+    """
+    Output of a script as written by main.py, optionally optimized (-O) or memoized (--memoize-dir)
+    """
+    statements = Parser().parse(script)
+    if optimize:
+        statements = Optimizer().optimize(statements)
+    generator = FilterLayerGenerator(result_cache=result_cache)
+    for statement in statements:
+        generator.generate(statement)
+    return b''.join(encode_chunks(generator.iter_output()))